@@ -1,97 +1,351 @@
 """API routes for file upload and management."""
-from typing import Dict, List
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy import desc, select
+from contextlib import suppress
+from typing import AsyncIterator, Dict, List
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from sqlalchemy import desc, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.db.async_connection import get_async_db
 from app.db.connection import get_db
 from app.db.file_process import FileProcessor
-from app.pydantic_models import FileUploadResponse
-from app.tasks.csv_task import process_csv
+from app.db.products import Product
+from app.pydantic_models import (
+    CompleteMultipartUploadRequest,
+    FileUploadResponse,
+    MultipartUploadRequest,
+    MultipartUploadResponse,
+    PresignedPartsRequest,
+    PresignedPartsResponse,
+)
+from app.tasks.csv_task import process_csv, reset_file_progress
 from app.utils.aws import create_session
-from app.constants.file import FileStatus
+from app.utils.input_readers import read_fieldnames
+from app.utils.s3_upload import (
+    UPLOAD_READ_SIZE,
+    InvalidCsvError,
+    check_header,
+    stream_csv_to_s3,
+)
+from app.constants.file import S3_BUCKET, FileStatus
 
 router = APIRouter()
 
+PRESIGNED_URL_EXPIRY = 3600
+MAX_UPLOAD_PARTS = 10000
+FILE_PAGE_SIZE = 50
+MAX_FILE_PAGE_SIZE = 500
+
+
+def file_name_taken(db: Session, file_name: str) -> bool:
+    """Check whether a file with the given name was already uploaded."""
+    return db.execute(
+        select(FileProcessor.id).where(
+            func.lower(FileProcessor.file_name) == file_name.lower()
+        )
+    ).first() is not None
+
+
+def reserve_file_record(
+    db: Session, file_name: str, full_sync: bool = False
+) -> FileProcessor:
+    """Insert the file processor record before any bytes are written to S3.
+
+    The unique index on lower(file_name) lets one of several concurrent
+    uploads of a name through, so only the upload holding the record ever
+    writes that key.
+    """
+    file_record = FileProcessor(
+        file_name=file_name,
+        status=FileStatus.PENDING,
+        total_number_of_records=0,
+        records_inserted=0,
+        records_updated=0,
+        full_sync=full_sync,
+        # Evaluated by the INSERT; products created after it stay active.
+        products_max_id=(
+            select(func.max(Product.id)).scalar_subquery() if full_sync else None
+        )
+    )
+    db.add(file_record)
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "File with the same name already exists"
+            }
+        ) from exc
+    db.refresh(file_record)
+    return file_record
+
+
+def release_file_record(db: Session, file_record: FileProcessor) -> None:
+    """Delete the record of an upload that failed, freeing its name."""
+    db.rollback()
+    db.delete(file_record)
+    db.commit()
+
+
+def enqueue_file_record(
+    db: Session, file_record: FileProcessor, total_number_of_records: int,
+    single_line_rows: bool = False
+) -> None:
+    """Record what the upload learned about the file and enqueue the import."""
+    file_record.total_number_of_records = total_number_of_records
+    file_record.single_line_rows = single_line_rows
+    db.commit()
+    process_csv.delay(file_record.file_name)
+
+
+async def read_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """Read an uploaded file in chunks without blocking the event loop."""
+    while chunk := await file.read(UPLOAD_READ_SIZE):
+        yield chunk
+
+
+async def ingest_upload(
+    chunks: AsyncIterator[bytes], file_name: str, db: Session,
+    full_sync: bool = False
+) -> FileUploadResponse:
+    """Stream an upload to S3 and register it for processing.
+
+    S3 and database calls run in the thread pool so concurrent uploads do
+    not stall other requests and websockets on the event loop.
+    """
+    file_record = await run_in_threadpool(reserve_file_record, db, file_name, full_sync)
+    file_id = file_record.id
+    s3_client = await run_in_threadpool(lambda: create_session().client("s3"))
+    # Rows are counted while the bytes stream to S3 so the worker can report
+    # totals without downloading the object a second time.
+    try:
+        result = await stream_csv_to_s3(chunks, s3_client, file_name)
+    except BaseException as exc:
+        await run_in_threadpool(release_file_record, db, file_record)
+        if isinstance(exc, InvalidCsvError):
+            raise HTTPException(status_code=400, detail={"message": str(exc)}) from exc
+        raise
+
+    await run_in_threadpool(
+        enqueue_file_record, db, file_record, result.row_count,
+        result.single_line_rows
+    )
+    return FileUploadResponse(
+        message="File uploaded successfully",
+        file_name=file_name,
+        file_id=file_id
+    )
+
 
 @router.post("/files")
 async def upload_file(
     file: UploadFile = File(...), db: Session = Depends(get_db),
-    file_name: str = None
+    file_name: str = None, full_sync: bool = False
 ) -> FileUploadResponse:
-    """Upload a CSV file for processing."""
+    """Upload a CSV file for processing.
+
+    With `full_sync`, the file is the whole catalogue and products missing
+    from it are deactivated once it has been imported.
+    """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No selected file")
 
-    session = create_session()
-    if file:
-        session.client("s3").upload_fileobj(
-            Bucket="temp-csv-files-product-importer",
-            Fileobj=file.file,
-            Key=file.filename
-        )
-    if not file_name:
-        file_name = file.filename
-    file_processor = db.execute(
-        select(FileProcessor).where(FileProcessor.file_name == file_name)
-    ).scalar_one_or_none()
-    if file_processor:
-        print("File with the same name already exists")
+    return await ingest_upload(
+        read_upload(file), file_name or file.filename, db, full_sync
+    )
+
+
+@router.post("/files/stream")
+async def upload_file_stream(
+    request: Request, file_name: str, db: Session = Depends(get_db),
+    full_sync: bool = False
+) -> FileUploadResponse:
+    """Upload a raw CSV request body, streamed to S3 as it arrives."""
+    return await ingest_upload(request.stream(), file_name, db, full_sync)
+
+@router.post("/files/uploads")
+def start_multipart_upload(
+    data: MultipartUploadRequest, db: Session = Depends(get_db)
+) -> MultipartUploadResponse:
+    """Start a multipart upload that the client sends straight to S3."""
+    if file_name_taken(db, data.file_name):
         raise HTTPException(
             status_code=400,
             detail={
                 "message": "File with the same name already exists"
             }
         )
-    file_record = FileProcessor(
-        file_name=file_name,
-        status=FileStatus.PENDING,
-        total_number_of_records=0,
-        records_inserted=0,
-        records_updated=0
+    response = create_session().client("s3").create_multipart_upload(
+        Bucket=S3_BUCKET, Key=data.file_name, ContentType="text/csv"
     )
-    db.add(file_record)
-    db.commit()
-    db.refresh(file_record)
-    process_csv.delay(file_name)
+    return MultipartUploadResponse(
+        upload_id=response["UploadId"], file_name=data.file_name
+    )
+
+
+@router.post("/files/uploads/{upload_id}/parts")
+def get_presigned_part_urls(
+    upload_id: str, data: PresignedPartsRequest
+) -> PresignedPartsResponse:
+    """Get presigned URLs the client can PUT the given parts to."""
+    if not data.part_numbers or not all(
+        1 <= part_number <= MAX_UPLOAD_PARTS for part_number in data.part_numbers
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Part numbers must be between 1 and {MAX_UPLOAD_PARTS}"
+        )
+    s3_client = create_session().client("s3")
+    urls = {
+        part_number: s3_client.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': S3_BUCKET,
+                'Key': data.file_name,
+                'UploadId': upload_id,
+                'PartNumber': part_number
+            },
+            ExpiresIn=PRESIGNED_URL_EXPIRY
+        )
+        for part_number in data.part_numbers
+    }
+    return PresignedPartsResponse(upload_id=upload_id, urls=urls)
+
+
+@router.post("/files/uploads/{upload_id}/complete")
+def complete_multipart_upload(
+    upload_id: str, data: CompleteMultipartUploadRequest,
+    db: Session = Depends(get_db)
+) -> FileUploadResponse:
+    """Complete a direct-to-S3 upload and enqueue the file for processing.
+
+    The name is reserved before the object is assembled, so a second upload
+    of a taken name never overwrites the existing file; its parts are
+    discarded instead.
+    """
+    s3_client = create_session().client("s3")
+    try:
+        file_record = reserve_file_record(db, data.file_name, data.full_sync)
+    except HTTPException:
+        with suppress(ClientError):
+            s3_client.abort_multipart_upload(
+                Bucket=S3_BUCKET, Key=data.file_name, UploadId=upload_id
+            )
+        raise
+
+    try:
+        s3_client.complete_multipart_upload(
+            Bucket=S3_BUCKET,
+            Key=data.file_name,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"ETag": part.etag, "PartNumber": part.part_number}
+                    for part in sorted(data.parts, key=lambda p: p.part_number)
+                ]
+            }
+        )
+    except ClientError as exc:
+        release_file_record(db, file_record)
+        raise HTTPException(
+            status_code=400,
+            detail={"message": exc.response["Error"].get("Message", str(exc))}
+        ) from exc
+
+    # The object now exists and was created by this upload alone.
+    try:
+        check_header(read_fieldnames(s3_client, data.file_name))
+    except (InvalidCsvError, ClientError) as exc:
+        s3_client.delete_object(Bucket=S3_BUCKET, Key=data.file_name)
+        release_file_record(db, file_record)
+        raise HTTPException(status_code=400, detail={"message": str(exc)}) from exc
+
+    # The row total is settled by the worker; progress is tracked in bytes.
+    enqueue_file_record(db, file_record, 0)
+
     return FileUploadResponse(
         message="File uploaded successfully",
         file_name=file_record.file_name,
         file_id=file_record.id
     )
 
-@router.get("/files")
-def list_files(db: Session = Depends(get_db)) -> Dict[str, str | List[Dict[str, str | int]]]:
-    """List all uploaded files with their status."""
-    files = db.execute(
-        select(FileProcessor).order_by(desc(FileProcessor.id))
-    ).scalars().all()
-    files_res: List[Dict[str, str | int]] = [
-        {
-            "id": file.id,
-            "file_name": file.file_name,
-            "status": file.status,
-            "total_number_of_records": file.total_number_of_records,
-            "records_inserted": file.records_inserted,
-            "records_updated": file.records_updated,
-            "file_with_errors": file.file_with_errors
-        }
-        for file in files
-    ]
+
+@router.delete("/files/uploads/{upload_id}")
+def abort_multipart_upload(upload_id: str, file_name: str) -> Dict[str, str]:
+    """Abort a direct-to-S3 upload and discard its uploaded parts."""
+    create_session().client("s3").abort_multipart_upload(
+        Bucket=S3_BUCKET, Key=file_name, UploadId=upload_id
+    )
+    return {"status": "aborted"}
+
+
+def file_to_dict(file: FileProcessor) -> Dict[str, str | int | dict]:
+    """Serialize a file record for API responses."""
+    return {
+        "id": file.id,
+        "file_name": file.file_name,
+        "status": file.status,
+        "total_number_of_records": file.total_number_of_records,
+        "records_inserted": file.records_inserted,
+        "records_updated": file.records_updated,
+        "records_unchanged": file.records_unchanged,
+        "records_deactivated": file.records_deactivated,
+        "rows_with_errors": file.rows_with_errors,
+        "file_with_errors": file.file_with_errors,
+        "timings": file.timings or {}
+    }
+
+
+async def list_file_page(
+    db: AsyncSession, condition, cursor: int | None, limit: int,
+    status: List[FileStatus] | None
+) -> Dict[str, str | bool | None | List[Dict[str, str | int]]]:
+    """Newest-first page of files after the `cursor` id.
+
+    Ordered by id and filtered by status, so each page is a range scan of
+    the (status, id) index or the primary key.
+    """
+    stmt = select(FileProcessor)
+    if condition is not None:
+        stmt = stmt.where(condition)
+    if status:
+        stmt = stmt.where(FileProcessor.status.in_(status))
+    if cursor is not None:
+        stmt = stmt.where(FileProcessor.id < cursor)
+    stmt = stmt.order_by(desc(FileProcessor.id)).limit(limit)
+    files = (await db.execute(stmt)).scalars().all()
     return {
-        "files": files_res,
+        "files": [file_to_dict(file) for file in files],
+        "next_cursor": str(files[-1].id) if files else None,
+        "has_more": len(files) == limit,
         "status": "ok"
     }
 
 
+@router.get("/files")
+async def list_files(
+    db: AsyncSession = Depends(get_async_db),
+    cursor: int | None = None,
+    limit: int = Query(FILE_PAGE_SIZE, ge=1, le=MAX_FILE_PAGE_SIZE),
+    status: List[FileStatus] | None = Query(None),
+) -> Dict[str, str | bool | None | List[Dict[str, str | int]]]:
+    """List uploaded files, newest first, one page at a time."""
+    return await list_file_page(db, None, cursor, limit, status)
+
+
 @router.get("/files/{file_id}/error-download-url")
 async def get_error_file_download_url(
-    file_id: int, db: Session = Depends(get_db)
+    file_id: int, db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, str]:
     """Get a presigned URL to download error file for a given file ID."""
-    file_record = db.execute(
+    file_record = (await db.execute(
         select(FileProcessor).where(FileProcessor.id == file_id)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
 
     if not file_record:
         raise HTTPException(status_code=404, detail="File not found")
@@ -104,10 +358,10 @@ async def get_error_file_download_url(
     presigned_url = s3_client.generate_presigned_url(
         'get_object',
         Params={
-            'Bucket': 'temp-csv-files-product-importer',
+            'Bucket': S3_BUCKET,
             'Key': file_record.file_with_errors
         },
-        ExpiresIn=3600
+        ExpiresIn=PRESIGNED_URL_EXPIRY
     )
 
     return {"error_file_download_url": presigned_url}
@@ -126,65 +380,47 @@ def retry_file(
         return HTTPException(status_code=404, detail="File is already processed")
     if file.status == FileStatus.PROCESSING:
         return HTTPException(status_code=404, detail="File is getting processed")
+    if file.status == FileStatus.COMPLETED_WITH_ERRORS:
+        # Imported again from the start; a failed file resumes from its
+        # checkpoint instead.
+        reset_file_progress(db, file)
+        file.status = FileStatus.PENDING
+        db.commit()
     process_csv.delay(file.file_name)
 
 
 @router.get("/files/{file_id}/status")
-def get_current_file_status(
-    file_id: int, db = Depends(get_db)
+async def get_current_file_status(
+    file_id: int, db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, int | str]:
-    file: FileProcessor | None = db.execute(
+    file: FileProcessor | None = (await db.execute(
         select(FileProcessor).where(FileProcessor.id == file_id)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if not file:
         return HTTPException(status_code=404, detail="No file available")
-    return {
-        "id": file.id,
-        "file_name": file.file_name,
-        "status": file.status,
-        "total_number_of_records": file.total_number_of_records,
-        "records_inserted": file.records_inserted,
-        "records_updated": file.records_updated,
-        "file_with_errors": file.file_with_errors
-    }
+    return file_to_dict(file)
 
 
 @router.get("/files/search")
-def search_files(
-    db: Session = Depends(get_db),
-    q: str = ""
-) -> Dict[str, str | List[Dict[str, str | int]]]:
-    """Search files by file name."""
+async def search_files(
+    db: AsyncSession = Depends(get_async_db),
+    q: str = "",
+    cursor: int | None = None,
+    limit: int = Query(FILE_PAGE_SIZE, ge=1, le=MAX_FILE_PAGE_SIZE),
+    status: List[FileStatus] | None = Query(None),
+) -> Dict[str, str | bool | None | List[Dict[str, str | int]]]:
+    """Search files by file name, newest first, one page at a time."""
     if not q or not q.strip():
         # If no query, return empty results
         return {
             "files": [],
+            "next_cursor": None,
+            "has_more": False,
             "status": "ok"
         }
-    
-    # Build search query - search in file_name
+
+    # Served by the trigram index on file_name.
     search_term = f"%{q.strip()}%"
-    
-    files = db.execute(
-        select(FileProcessor)
-        .where(FileProcessor.file_name.ilike(search_term))
-        .order_by(desc(FileProcessor.id))
-    ).scalars().all()
-    
-    files_res: List[Dict[str, str | int]] = [
-        {
-            "id": file.id,
-            "file_name": file.file_name,
-            "status": file.status,
-            "total_number_of_records": file.total_number_of_records,
-            "records_inserted": file.records_inserted,
-            "records_updated": file.records_updated,
-            "file_with_errors": file.file_with_errors
-        }
-        for file in files
-    ]
-    
-    return {
-        "files": files_res,
-        "status": "ok"
-    }
\ No newline at end of file
+    return await list_file_page(
+        db, FileProcessor.file_name.ilike(search_term), cursor, limit, status
+    )
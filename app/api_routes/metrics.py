@@ -0,0 +1,29 @@
+"""Prometheus metrics endpoint."""
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.celery_app import celery_app
+from app.utils.metrics import IMPORT_QUEUE_DEPTH, metrics_registry
+
+router = APIRouter()
+
+
+def update_queue_depth() -> None:
+    """Sample how many tasks wait in the default Celery queue."""
+    try:
+        with celery_app.connection_for_read() as connection:
+            declared = connection.default_channel.queue_declare(
+                queue=celery_app.conf.task_default_queue, passive=True
+            )
+        IMPORT_QUEUE_DEPTH.set(declared.message_count)
+    except Exception as exc:  # pylint: disable=broad-except
+        print(f"Could not read the Celery queue depth: {exc}")
+
+
+@router.get("/metrics")
+def get_metrics() -> Response:
+    """Import pipeline and queue metrics in the Prometheus text format."""
+    update_queue_depth()
+    return Response(
+        generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST
+    )
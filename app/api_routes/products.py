@@ -1,14 +1,45 @@
 """API routes for product management."""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select, or_
+import base64
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, func, select, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.db.async_connection import get_async_db
 from app.db.connection import get_db
+from app.db.models import SessionLocal
 from app.db.products import Product
-from app.pydantic_models import ProductSchema
+from app.pydantic_models import (
+    ProductBatchDeleteRequest,
+    ProductBatchItem,
+    ProductBatchResponse,
+    ProductBatchResult,
+    ProductSchema,
+)
+from app.tasks.csv_task import upsert_products
+from app.tasks.validation import PRODUCT_COLUMNS, validate_rows
+from app.utils.product_cache import product_cache
 
 router = APIRouter()
 
+ProductSort = Literal["id", "sku", "name", "recent"]
+# Items written per set-based statement and commit by the batch endpoints.
+PRODUCT_BATCH_SIZE = 5000
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson")
+ExportFormat = Literal["csv", "ndjson"]
+EXPORT_COLUMNS = ("id", "sku", "name", "description", "active")
+# Rows fetched per round trip from the server-side cursor of an export.
+EXPORT_FETCH_SIZE = 10000
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
 
 @router.post("/products")
 def upsert_product(data: ProductSchema, db: Session = Depends(get_db)):
@@ -26,6 +57,7 @@ def upsert_product(data: ProductSchema, db: Session = Depends(get_db)):
         db.add(product)
 
     db.commit()
+    product_cache.invalidate([data.sku])
     return {"status": "ok"}
 
 
@@ -41,16 +73,328 @@ def delete_product(sku: str, db: Session = Depends(get_db)) -> dict[str, str]:
 
     db.delete(product)
     db.commit()
+    product_cache.invalidate([sku])
     return {"status": "deleted"}
 
+
+async def read_ndjson(request: Request) -> AsyncIterator[bytes]:
+    """Yield the non-empty lines of an NDJSON request body as it arrives."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+async def read_batch_items(request: Request) -> AsyncIterator[bytes | dict]:
+    """Yield the raw items of a JSON array or NDJSON batch request body."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(NDJSON_CONTENT_TYPES):
+        async for line in read_ndjson(request):
+            yield line
+        return
+
+    try:
+        items = await request.json()
+    except ValueError as exc:
+        raise HTTPException(400, "Body must be a JSON array or NDJSON") from exc
+    if not isinstance(items, list):
+        raise HTTPException(400, "Body must be a JSON array or NDJSON")
+    for item in items:
+        yield item
+
+
+def parse_batch_item(item: bytes | dict) -> ProductBatchItem:
+    """Validate one item of a batch request."""
+    if isinstance(item, bytes):
+        return ProductBatchItem.model_validate_json(item)
+    return ProductBatchItem.model_validate(item)
+
+
+@router.post("/products:batch")
+async def upsert_products_batch(
+    request: Request, db: Session = Depends(get_db)
+) -> ProductBatchResponse:
+    """Upsert many products from a JSON array or an NDJSON stream.
+
+    Items go through the same validation rules and set-based statement as
+    imports, one statement and commit per PRODUCT_BATCH_SIZE items; within a
+    batch the last item for a SKU wins.
+    """
+    results: list[ProductBatchResult] = []
+    rows: list[tuple[str | None, ...]] = []
+    pending: list[ProductBatchResult] = []
+
+    async def flush() -> None:
+        valid_rows, rejected = validate_rows(rows, PRODUCT_COLUMNS)
+        for row_index, reason in rejected:
+            pending[row_index].status = "error"
+            pending[row_index].error = reason
+        try:
+            await run_in_threadpool(upsert_products, db, valid_rows)
+        except Exception as exc:  # pylint: disable=broad-except
+            for result in pending:
+                if result.status != "error":
+                    result.status = "error"
+                    result.error = f"batch failed: {exc.__class__.__name__}"
+        rows.clear()
+        pending.clear()
+
+    index = 0
+    async for item in read_batch_items(request):
+        try:
+            product = parse_batch_item(item)
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            field = ".".join(map(str, error["loc"]))
+            results.append(ProductBatchResult(
+                index=index, status="error",
+                error=f"{field}: {error['msg']}" if field else error["msg"]
+            ))
+        else:
+            result = ProductBatchResult(index=index, sku=product.sku, status="upserted")
+            results.append(result)
+            pending.append(result)
+            rows.append((product.sku, product.name, product.description))
+            if len(rows) >= PRODUCT_BATCH_SIZE:
+                await flush()
+        index += 1
+
+    if rows:
+        await flush()
+
+    failed = sum(result.status == "error" for result in results)
+    return ProductBatchResponse(
+        results=results,
+        succeeded=len(results) - failed,
+        failed=failed,
+        status="ok",
+    )
+
+
+def delete_products(db: Session, skus: list[str]) -> set[str]:
+    """Delete products by case-insensitive SKU; returns the lowercase SKUs deleted."""
+    deleted: set[str] = set()
+    for start in range(0, len(skus), PRODUCT_BATCH_SIZE):
+        chunk = skus[start:start + PRODUCT_BATCH_SIZE]
+        deleted.update(db.execute(
+            delete(Product)
+            .where(func.lower(Product.sku).in_(chunk))
+            .returning(func.lower(Product.sku))
+        ).scalars())
+        db.commit()
+        product_cache.invalidate(chunk)
+    return deleted
+
+
+@router.post("/products:batch-delete")
+def delete_products_batch(
+    data: ProductBatchDeleteRequest, db: Session = Depends(get_db)
+) -> ProductBatchResponse:
+    """Delete many products by SKU, reporting which ones did not exist."""
+    skus = [sku.strip().lower() for sku in data.skus]
+    deleted = delete_products(db, [sku for sku in set(skus) if sku])
+    results = [
+        ProductBatchResult(
+            index=index,
+            sku=sku,
+            status="deleted" if sku in deleted else "not_found",
+        )
+        for index, sku in enumerate(skus)
+    ]
+    failed = sum(result.status != "deleted" for result in results)
+    return ProductBatchResponse(
+        results=results,
+        succeeded=len(results) - failed,
+        failed=failed,
+        status="ok",
+    )
+
+
+def search_filter(q: str):
+    """Filter matching products whose sku, name or description contain `q`."""
+    search_term = f"%{q.strip()}%"
+    return or_(
+        Product.sku.ilike(search_term),
+        Product.name.ilike(search_term),
+        Product.description.ilike(search_term),
+    )
+
+
+# Keyset sort column of each sort, selected with the rows so cursors carry
+# the value Postgres compares, e.g. its lower(sku) rather than Python's.
+SORT_KEYS = {
+    "id": Product.id,
+    "recent": Product.id,
+    "sku": func.lower(Product.sku),
+    "name": Product.name,
+}
+# Type of the sort value a cursor carries.
+SORT_VALUE_TYPES = {"id": int, "recent": int, "sku": str, "name": str}
+
+
+def encode_cursor(sort: ProductSort, value: str | int, last_id: int) -> str:
+    """Encode the position after the row with (value, last_id) as a cursor."""
+    payload = json.dumps([sort, value, last_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: ProductSort) -> tuple[str | int, int]:
+    """Decode a cursor into the (sort value, id) it points after."""
+    if cursor.isdigit() and sort == "id":
+        # Plain ids returned as cursors before keyset sorting existed.
+        return int(cursor), int(cursor)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = int(last_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(400, "Invalid cursor") from exc
+    if cursor_sort != sort:
+        raise HTTPException(400, "Cursor does not match the requested sort")
+    if isinstance(value, bool) or not isinstance(value, SORT_VALUE_TYPES[sort]):
+        raise HTTPException(400, "Invalid cursor")
+    return value, last_id
+
+
+def keyset_condition(sort: ProductSort, value: str | int, last_id: int):
+    """Condition selecting the rows after (value, last_id) in sort order."""
+    if sort == "id":
+        return Product.id > last_id
+    if sort == "recent":
+        return Product.id < last_id
+    if sort == "sku":
+        # lower(sku) is unique, so it alone orders rows totally.
+        return func.lower(Product.sku) > value
+    return tuple_(Product.name, Product.id) > tuple_(value, last_id)
+
+
+SORT_ORDER = {
+    "id": (Product.id,),
+    "recent": (Product.id.desc(),),
+    "sku": (func.lower(Product.sku),),
+    "name": (Product.name, Product.id),
+}
+
+
+def product_to_dict(product: Product) -> dict[str, str | int | bool | None]:
+    """Serialize a product for API responses and the product cache."""
+    return {
+        "id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "description": product.description,
+        "active": product.active,
+    }
+
+
+@router.get("/products/cache/stats")
+def get_product_cache_stats() -> dict[str, int | float]:
+    """Hit/miss counters of the product cache in this API process."""
+    return product_cache.stats()
+
+
+def encode_export_rows(rows, export_format: ExportFormat) -> bytes:
+    """Serialize a partition of exported rows."""
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows
+        ).encode("utf-8")
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def export_products(export_format: ExportFormat, q: str | None) -> Iterator[bytes]:
+    """Stream products in id order from a server-side cursor.
+
+    The generator owns its session, since it is consumed after the request
+    dependencies have been torn down.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode("utf-8")
+
+    stmt = select(*(getattr(Product, column) for column in EXPORT_COLUMNS))
+    if q:
+        stmt = stmt.where(search_filter(q))
+    stmt = stmt.order_by(Product.id).execution_options(yield_per=EXPORT_FETCH_SIZE)
+
+    with SessionLocal() as db:
+        for rows in db.execute(stmt).partitions():
+            yield encode_export_rows(rows, export_format)
+
+
+@router.get("/products/export")
+def export_products_file(
+    format: ExportFormat = "csv",  # pylint: disable=redefined-builtin
+    q: str | None = None,
+) -> StreamingResponse:
+    """Download all products, or those matching `q`, as CSV or NDJSON.
+
+    Memory stays constant whatever the catalogue size: rows are read in
+    batches from a server-side cursor and streamed as they are encoded.
+    """
+    return StreamingResponse(
+        export_products(format, q),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="products.{format}"'
+        },
+    )
+
+
+@router.get("/products/count")
+async def get_products_count(
+    db: AsyncSession = Depends(get_async_db),
+    q: str | None = None,
+) -> dict[str, int | str]:
+    """Estimate how many products match, from planner statistics.
+
+    The estimate comes from EXPLAIN, so it costs the same on any table size
+    but may be off for very selective searches.
+    """
+    stmt = select(Product.id)
+    if q:
+        stmt = stmt.where(search_filter(q))
+    compiled = stmt.compile(dialect=db.bind.dialect)
+    # asyncpg takes positional ($1, $2, ...) parameters.
+    params = (
+        tuple(compiled.params[name] for name in compiled.positiontup)
+        if compiled.positional else compiled.params
+    )
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", params
+    )).scalar()
+    if isinstance(plan, str):
+        # Raw driver SQL skips the JSON result processing.
+        plan = json.loads(plan)
+    return {
+        "estimated_count": int(plan[0]["Plan"]["Plan Rows"]),
+        "status": "ok",
+    }
+
+
 @router.get("/products")
-def get_products(
-    db: Session = Depends(get_db),
+async def get_products(
+    db: AsyncSession = Depends(get_async_db),
     sku: str | None = None,
     q: str | None = None,
-    cursor: int | None = None,
+    cursor: str | None = None,
     limit: int = 50,
+    sort: ProductSort = "id",
 ):
+    """List products with keyset pagination, optionally searched and sorted.
+
+    The cursor encodes the sort value and id of the last row returned, so
+    every page is an index range scan no matter how deep it is.
+    """
     if sku and q:
         raise HTTPException(400, "Use either sku or q, not both")
 
@@ -58,54 +402,42 @@ def get_products(
 
     # 🎯 GET by SKU
     if sku:
-        stmt = stmt.where(Product.sku == sku)
-        product = db.execute(stmt).scalar_one_or_none()
+        cached = await product_cache.get_async(sku)
+        if cached is None:
+            # Matches the unique index on lower(sku).
+            stmt = stmt.where(func.lower(Product.sku) == sku.strip().lower())
+            product = (await db.execute(stmt)).scalar_one_or_none()
+
+            if not product:
+                raise HTTPException(404, "Product not found")
 
-        if not product:
-            raise HTTPException(404, "Product not found")
+            cached = product_to_dict(product)
+            await product_cache.set_async(sku, cached)
 
         return {
-            "products": [{
-                "id": product.id,
-                "sku": product.sku,
-                "name": product.name,
-                "description": product.description,
-                "active": product.active,
-            }],
+            "products": [cached],
             "has_more": False,
             "next_cursor": None,
             "status": "ok",
         }
 
     if q:
-        search_term = f"%{q.strip()}%"
-        stmt = stmt.where(
-            or_(
-                Product.sku.ilike(search_term),
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term),
-            )
-        )
+        stmt = stmt.where(search_filter(q))
 
     if cursor:
-        stmt = stmt.where(Product.id > cursor)
+        stmt = stmt.where(keyset_condition(sort, *decode_cursor(cursor, sort)))
 
-    stmt = stmt.order_by(Product.id).limit(limit)
+    stmt = stmt.add_columns(SORT_KEYS[sort]).order_by(*SORT_ORDER[sort]).limit(limit)
 
-    products = db.execute(stmt).scalars().all()
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if rows:
+        last_product, last_value = rows[-1]
+        next_cursor = encode_cursor(sort, last_value, last_product.id)
 
     return {
-        "products": [
-            {
-                "id": p.id,
-                "sku": p.sku,
-                "name": p.name,
-                "description": p.description,
-                "active": p.active,
-            }
-            for p in products
-        ],
-        "next_cursor": products[-1].id if products else None,
-        "has_more": len(products) == limit,
+        "products": [product_to_dict(product) for product, _ in rows],
+        "next_cursor": next_cursor,
+        "has_more": len(rows) == limit,
         "status": "ok",
     }
@@ -2,14 +2,68 @@
 import os
 
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 
 BROKER_URL = os.getenv("CELERY_BROKER_URL")
-celery_app: Celery = Celery('product_importer', broker=BROKER_URL)
+# Needed by the chord that joins fanned-out CSV chunk tasks.
+RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
+# Seconds before the Redis broker hands an unacknowledged task to another
+# worker. Imports are acknowledged when they finish (acks_late), so this must
+# exceed the longest import.
+CELERY_VISIBILITY_TIMEOUT = int(os.getenv("CELERY_VISIBILITY_TIMEOUT", "43200"))
+# Port of the worker's Prometheus exporter; 0 disables it.
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+celery_app: Celery = Celery(
+    'product_importer', broker=BROKER_URL, backend=RESULT_BACKEND
+)
 
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
+    broker_transport_options={"visibility_timeout": CELERY_VISIBILITY_TIMEOUT},
+    # Prefetched tasks are unacknowledged too; reserve one at a time.
+    worker_prefetch_multiplier=1,
+    # Run by `celery -A app.celery_app beat`.
+    beat_schedule={
+        "archive-finished-files": {
+            "task": "archive_finished_files",
+            "schedule": crontab(hour=3, minute=0),
+        },
+    },
 )
-celery_app.autodiscover_tasks(packages=["app.tasks.csv_task"])
+celery_app.autodiscover_tasks(packages=[
+    "app.tasks.csv_task", "app.tasks.csv_fanout", "app.tasks.file_retention"
+])
+
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):  # pylint: disable=unused-argument
+    """Drop pooled connections inherited from the parent across the fork."""
+    from app.db.models import engine  # pylint: disable=import-outside-toplevel
+
+    engine.dispose(close=False)
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):  # pylint: disable=unused-argument
+    """Serve the metrics of every pool process from the main worker process."""
+    if not WORKER_METRICS_PORT:
+        return
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import start_http_server
+
+    from app.utils.metrics import metrics_registry
+
+    start_http_server(WORKER_METRICS_PORT, registry=metrics_registry())
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):  # pylint: disable=unused-argument
+    """Drop the live gauges of a pool process that exited."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess  # pylint: disable=import-outside-toplevel
+
+        multiprocess.mark_process_dead(pid or os.getpid())
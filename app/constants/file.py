@@ -7,3 +7,21 @@ class FileStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     COMPLETED_WITH_ERRORS = "completed_with_errors"
+
+
+FINISHED_STATUSES = (FileStatus.COMPLETED, FileStatus.COMPLETED_WITH_ERRORS)
+
+
+class LoadMode(str, Enum):
+    INSERT = "insert"
+    COPY = "copy"
+
+
+class InputFormat(str, Enum):
+    CSV = "csv"
+    CSV_GZIP = "csv.gz"
+    CSV_ZSTD = "csv.zst"
+    PARQUET = "parquet"
+
+
+S3_BUCKET = "temp-csv-files-product-importer"
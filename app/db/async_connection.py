@@ -0,0 +1,18 @@
+"""Async database sessions for FastAPI routes and websockets."""
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.engine import create_app_async_engine
+
+async_engine = create_app_async_engine()
+
+AsyncSessionLocal = async_sessionmaker(  # pylint: disable=invalid-name
+    async_engine, expire_on_commit=False
+)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Get an async database session dependency for FastAPI."""
+    async with AsyncSessionLocal() as db:
+        yield db
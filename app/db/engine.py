@@ -0,0 +1,118 @@
+"""Engine configuration for the API and worker processes."""
+import os
+import random
+import time
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+DB_USERNAME = os.getenv("DB_USERNAME")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST", "postgres")
+DB_NAME = os.getenv("DB_NAME")
+DB_PORT = os.getenv("DB_PORT")
+DATABASE_URL = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# FastAPI routes read through asyncpg; workers stay on psycopg2.
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# "api" for uvicorn, "worker" for Celery; picks the pool defaults below.
+PROCESS_ROLE = os.getenv("PROCESS_ROLE", "api")
+# Defaults of the psycopg2 pool. The API only writes, uploads and exports
+# through it, its reads go through the asyncpg pool; a prefork worker
+# process runs one task at a time and holds its session's connection plus
+# the one keeping the import's lease.
+ROLE_POOL_DEFAULTS = {
+    "api": {"pool_size": 5, "max_overflow": 10},
+    "worker": {"pool_size": 2, "max_overflow": 2},
+}
+if PROCESS_ROLE not in ROLE_POOL_DEFAULTS:
+    raise ValueError(
+        f"PROCESS_ROLE must be one of {', '.join(ROLE_POOL_DEFAULTS)}, "
+        f"got {PROCESS_ROLE!r}"
+    )
+POOL_SIZE = int(os.getenv(
+    "DB_POOL_SIZE", str(ROLE_POOL_DEFAULTS[PROCESS_ROLE]["pool_size"])
+))
+MAX_OVERFLOW = int(os.getenv(
+    "DB_MAX_OVERFLOW", str(ROLE_POOL_DEFAULTS[PROCESS_ROLE]["max_overflow"])
+))
+# Only the API builds the asyncpg engine; it serves the many concurrent
+# read requests and websocket lookups.
+ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycled before PostgreSQL or a proxy in between drops idle connections.
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+# Rows per INSERT ... VALUES page when SQLAlchemy batches executemany().
+INSERTMANYVALUES_PAGE_SIZE = int(os.getenv("DB_INSERTMANYVALUES_PAGE_SIZE", "1000"))
+
+# Statements slower than this are logged, for a sampled share of them.
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("DB_SLOW_QUERY_SAMPLE_RATE", "1.0"))
+SLOW_QUERY_MAX_CHARS = 500
+
+
+def engine_options(pool_size: int, max_overflow: int) -> dict:
+    """Keyword arguments for create_engine() with the given pool size."""
+    return {
+        "echo": DB_ECHO,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def log_slow_queries(target: Engine) -> None:
+    """Print statements slower than DB_SLOW_QUERY_MS, sampled."""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def start_timer(  # pylint: disable=unused-argument,too-many-arguments
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def report_slow(  # pylint: disable=unused-argument,too-many-arguments
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if elapsed_ms < SLOW_QUERY_MS or random.random() >= SLOW_QUERY_SAMPLE_RATE:
+            return
+        # Parameters are left out: VALUES lists carry whole batches of rows.
+        print(
+            f"Slow query ({PROCESS_ROLE}) {elapsed_ms:.0f} ms, "
+            f"{cursor.rowcount} rows: {statement[:SLOW_QUERY_MAX_CHARS]}"
+        )
+
+
+def create_app_engine() -> Engine:
+    """Create the engine shared by this process."""
+    app_engine = create_engine(
+        DATABASE_URL,
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=INSERTMANYVALUES_PAGE_SIZE,
+        connect_args={"application_name": f"product-importer-{PROCESS_ROLE}"},
+        **engine_options(POOL_SIZE, MAX_OVERFLOW),
+    )
+    if SLOW_QUERY_MS > 0:
+        log_slow_queries(app_engine)
+    return app_engine
+
+
+def create_app_async_engine() -> AsyncEngine:
+    """Create the asyncpg engine used by the API's request handlers."""
+    app_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={
+            "server_settings": {"application_name": f"product-importer-{PROCESS_ROLE}"}
+        },
+        **engine_options(ASYNC_POOL_SIZE, ASYNC_MAX_OVERFLOW),
+    )
+    if SLOW_QUERY_MS > 0:
+        log_slow_queries(app_engine.sync_engine)
+    return app_engine
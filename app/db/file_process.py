@@ -1,9 +1,12 @@
-"""File processor database model."""
-from sqlalchemy import Index, text
+"""File processor database models."""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, func, text
 from sqlalchemy import Enum as SqlEnum
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.db.models import Base
+from app.db.models import ADDED_COLUMN, Base
 from app.constants.file import FileStatus
 
 
@@ -25,7 +28,44 @@ class FileProcessor(Base):
     total_number_of_records: Mapped[int] = mapped_column(default=0)
     records_inserted: Mapped[int] = mapped_column(default=0)
     records_updated: Mapped[int] = mapped_column(default=0)
+    # Rows whose SKU already existed with the same content; nothing was written.
+    records_unchanged: Mapped[int] = mapped_column(
+        default=0, server_default=text("0"), info=ADDED_COLUMN
+    )
     file_with_errors: Mapped[str] = mapped_column(default="")
+    rows_with_errors: Mapped[int] = mapped_column(
+        default=0, server_default=text("0"), info=ADDED_COLUMN
+    )
+    # Full-sync imports deactivate every product missing from the file.
+    full_sync: Mapped[bool] = mapped_column(
+        default=False, server_default=text("false"), info=ADDED_COLUMN
+    )
+    records_deactivated: Mapped[int] = mapped_column(
+        default=0, server_default=text("0"), info=ADDED_COLUMN
+    )
+    # Highest product id when a full-sync file was uploaded; products created
+    # later are not in the file and are never deactivated by it.
+    products_max_id: Mapped[int | None] = mapped_column(info=ADDED_COLUMN)
+    # No quoted field of the CSV spans lines, as checked while it was
+    # uploaded; only then may it be split into byte ranges at newlines.
+    single_line_rows: Mapped[bool] = mapped_column(
+        default=False, server_default=text("false"), info=ADDED_COLUMN
+    )
+    # Position after the last checkpointed batch; a retry resumes from here.
+    checkpoint_offset: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default=text("0"), info=ADDED_COLUMN
+    )
+    checkpoint_row: Mapped[int] = mapped_column(
+        default=0, server_default=text("0"), info=ADDED_COLUMN
+    )
+    # Rows that predate the column get the time it was added.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), info=ADDED_COLUMN
+    )
+    # Seconds per import stage, plus rows/bytes per second of the last run.
+    timings: Mapped[dict] = mapped_column(
+        JSONB, default=dict, server_default=text("'{}'"), info=ADDED_COLUMN
+    )
 
     __table_args__ = (
         Index(
@@ -33,4 +73,39 @@ class FileProcessor(Base):
             text("lower(file_name)"),
             unique=True
         ),
+        # Newest-first listing, optionally filtered by status.
+        Index("ix_file_processor_status_id", "status", "id"),
+        # Serves `ILIKE '%term%'` file name search.
+        Index(
+            "ix_file_processor_file_name_trgm",
+            "file_name",
+            postgresql_using="gin",
+            postgresql_ops={"file_name": "gin_trgm_ops"}
+        ),
+    )
+
+
+class FileProcessorArchive(Base):
+    """Finished file records moved out of file_processor by the retention job.
+
+    The uploaded file and its error file are moved under an archive prefix
+    in S3; the keys here point at their new location.
+    """
+    __tablename__ = "file_processor_archive"
+
+    # Keeps the id the file had in file_processor.
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    file_name: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False)
+    total_number_of_records: Mapped[int] = mapped_column(default=0)
+    records_inserted: Mapped[int] = mapped_column(default=0)
+    records_updated: Mapped[int] = mapped_column(default=0)
+    records_unchanged: Mapped[int] = mapped_column(default=0)
+    records_deactivated: Mapped[int] = mapped_column(default=0)
+    rows_with_errors: Mapped[int] = mapped_column(default=0)
+    file_key: Mapped[str] = mapped_column(default="")
+    file_with_errors: Mapped[str] = mapped_column(default="")
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
     )
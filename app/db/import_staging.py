@@ -0,0 +1,30 @@
+"""Staging table for rows of an import that is processed in parallel."""
+from sqlalchemy import Column, Integer, String
+
+from app.db.models import Base
+
+
+class ImportStagingRow(Base):
+    """Unlogged staging rows written by parallel CSV chunk tasks."""
+    __tablename__ = "product_import_staging"
+
+    file_id = Column(Integer, primary_key=True)
+    chunk_index = Column(Integer, primary_key=True)
+    ord = Column(Integer, primary_key=True)
+    sku = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    description = Column(String)
+
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+
+class ImportTouchedSku(Base):
+    """Lowercase SKUs loaded by a full-sync import, kept until it finishes.
+
+    Logged on purpose: a resumed import relies on the SKUs recorded before
+    its checkpoint, and unlogged tables are emptied by crash recovery.
+    """
+    __tablename__ = "import_touched_skus"
+
+    file_id = Column(Integer, primary_key=True)
+    sku = Column(String, primary_key=True)
@@ -0,0 +1,47 @@
+"""Build indexes added to models after their tables were deployed.
+
+    python -m app.db.indexes
+
+create_all() creates the indexes of new tables but skips existing tables
+together with their indexes. Building a trigram index over a large products
+table takes minutes, so this runs once per deploy instead of at API startup,
+and every index is built CONCURRENTLY, without blocking writes.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+# Imported for their tables in Base.metadata.
+import app.db.file_process  # pylint: disable=unused-import
+import app.db.import_staging  # pylint: disable=unused-import
+import app.db.products  # pylint: disable=unused-import
+from app.db.models import Base, engine
+
+# An interrupted concurrent build leaves an invalid index, which
+# IF NOT EXISTS would then skip.
+INVALID_INDEX_SQL = text(
+    "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+)
+
+
+def create_missing_indexes(bind: Engine) -> None:
+    """Create every model index that does not exist yet, one at a time."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if connection.execute(INVALID_INDEX_SQL, {"name": index.name}).scalar():
+                    print(f"Index {index.name} is invalid; drop it and run again")
+                    continue
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(
+                    dialect=connection.dialect
+                ))
+                connection.exec_driver_sql(
+                    ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)
+                )
+                print(f"Index {index.name} is in place")
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    create_missing_indexes(engine)
@@ -1,5 +1,5 @@
 """Product database model."""
-from sqlalchemy import Boolean, Column, Index, Integer, String, func, text
+from sqlalchemy import DDL, Boolean, Column, Index, Integer, String, event, func, text
 
 from app.db.models import Base
 
@@ -20,4 +20,33 @@ class Product(Base):
             func.lower(sku),
             unique=True
         ),
+        # Keyset pagination ordered by name.
+        Index("ix_products_name_id", name, id),
+        # Trigram indexes let `ILIKE '%term%'` searches use a bitmap index scan
+        # instead of scanning the whole table.
+        Index(
+            "ix_products_sku_trgm",
+            sku,
+            postgresql_using="gin",
+            postgresql_ops={"sku": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_products_name_trgm",
+            name,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_products_description_trgm",
+            description,
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
     )
+
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
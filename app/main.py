@@ -1,17 +1,37 @@
 """Main FastAPI application."""
+import asyncio
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api_routes.files import router as UploadRouter
+from app.api_routes.metrics import router as MetricsRouter
 from app.api_routes.products import router as ProductsRouter
+from app.db.async_connection import async_engine
 from app.db.models import Base, engine
+from app.utils.product_cache import product_cache
 from app.websockets.file_process import router as FileProcessRouter
+from app.websockets.progress_hub import progress_hub
 
 load_dotenv()
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Run the shared Redis subscribers for the lifetime of the app."""
+    await progress_hub.start()
+    cache_listener = asyncio.create_task(product_cache.listen_for_invalidations())
+    yield
+    cache_listener.cancel()
+    await progress_hub.stop()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +43,7 @@ app.add_middleware(
 app.include_router(ProductsRouter)
 app.include_router(UploadRouter)
 app.include_router(FileProcessRouter)
+app.include_router(MetricsRouter)
 
 
 @app.get("/health")
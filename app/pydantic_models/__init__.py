@@ -27,3 +27,67 @@ class ProductResponse(BaseModel):
     name: str | None = None
     description: str | None = None
     active: bool | None = None
+
+
+class MultipartUploadRequest(BaseModel):
+    """Request model to start a direct-to-S3 multipart upload."""
+    file_name: str
+
+
+class MultipartUploadResponse(BaseModel):
+    """Response model for a started multipart upload."""
+    upload_id: str
+    file_name: str
+
+
+class PresignedPartsRequest(BaseModel):
+    """Request model for presigned part upload URLs."""
+    file_name: str
+    part_numbers: list[int]
+
+
+class PresignedPartsResponse(BaseModel):
+    """Response model mapping part numbers to presigned upload URLs."""
+    upload_id: str
+    urls: dict[int, str]
+
+
+class CompletedPart(BaseModel):
+    """A part uploaded to S3 and the ETag S3 returned for it."""
+    part_number: int
+    etag: str
+
+
+class CompleteMultipartUploadRequest(BaseModel):
+    """Request model to complete a multipart upload."""
+    file_name: str
+    parts: list[CompletedPart]
+    full_sync: bool = False
+
+
+class ProductBatchItem(BaseModel):
+    """One product of a batch upsert; a missing description keeps the stored one."""
+    sku: str
+    name: str
+    description: str | None = None
+
+
+class ProductBatchDeleteRequest(BaseModel):
+    """Request model to delete many products by SKU."""
+    skus: list[str]
+
+
+class ProductBatchResult(BaseModel):
+    """Outcome of one item of a batch product request."""
+    index: int
+    sku: str | None = None
+    status: str
+    error: str | None = None
+
+
+class ProductBatchResponse(BaseModel):
+    """Response model for batch product requests."""
+    results: list[ProductBatchResult]
+    succeeded: int
+    failed: int
+    status: str
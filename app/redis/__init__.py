@@ -1,43 +1,113 @@
 """Redis client and utility functions."""
-from typing import Callable, Literal, Union
+import json
+import os
 
-from redis import Redis
+from redis import ConnectionPool, Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool
+from redis.asyncio import Redis as AsyncRedis
 
-redis_client: Redis = Redis(host='redis', port=6379)
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+# Long-lived pub/sub listeners wait this long before resubscribing after a
+# lost connection, doubling up to the maximum while Redis stays down.
+PUBSUB_RECONNECT_DELAY = float(os.getenv("PUBSUB_RECONNECT_DELAY", "0.5"))
+PUBSUB_RECONNECT_MAX_DELAY = float(os.getenv("PUBSUB_RECONNECT_MAX_DELAY", "30"))
 
+POOL_SETTINGS = {
+    "host": REDIS_HOST,
+    "port": REDIS_PORT,
+    "max_connections": REDIS_MAX_CONNECTIONS,
+    "socket_timeout": REDIS_SOCKET_TIMEOUT,
+    "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+    "health_check_interval": 30,
+}
 
-def get_with_fallback(
-    name: str,
-    key: str,
-    datatype: Literal["str", "int"],
-    fallback: Callable[[str], Union[str, int]],
-) -> Union[str, int]:
-    """Get value from Redis, or use fallback function if not found."""
-    value = redis_client.hget(name, key)
+# Celery workers and sync code paths.
+redis_client: Redis = Redis(connection_pool=ConnectionPool(**POOL_SETTINGS))
+# FastAPI handlers and websockets; connections are opened lazily on the loop.
+async_redis_client: AsyncRedis = AsyncRedis(
+    connection_pool=AsyncConnectionPool(**POOL_SETTINGS)
+)
 
-    if value is None:
-        data = fallback(key)
 
-        # heal Redis
-        redis_client.hset(name, key, data)
+PROGRESS_CHANNEL_PREFIX = "file_progress:"
 
-        return data
+# Websocket payload field -> Redis hash holding it, keyed by file id.
+PROGRESS_HASHES = {
+    "status": "file_status",
+    "progress": "file_processing",
+    "total": "file_total",
+    "errors": "row_with_errors",
+    "bytes_processed": "file_bytes_processed",
+    "bytes_total": "file_bytes_total",
+    "inserted": "file_records_inserted",
+    "updated": "file_records_updated",
+    "unchanged": "file_records_unchanged",
+}
 
-    if datatype == "str":
-        return value.decode("utf-8")
 
-    return int(value)
+def progress_channel(file_id: int | str) -> str:
+    """Pub/sub channel carrying progress events of a file."""
+    return f"{PROGRESS_CHANNEL_PREFIX}{file_id}"
 
 
-def set_redis_data(
-    name: str, key: str, value: str | int
-) -> None:
-    """Set a given key-value pair in Redis"""
-    redis_client.hset(name, key, value)
+def decode_progress(values: list[bytes | None]) -> dict[str, str | int]:
+    """Map raw PROGRESS_HASHES values to payload fields, skipping misses."""
+    return {
+        field: (value.decode("utf-8") if field == "status" else int(value))
+        for field, value in zip(PROGRESS_HASHES, values)
+        if value is not None
+    }
 
 
-def increment_redis_data(
-    name: str, key: str, amount: int = 1
-) -> None:
-    """Increment a given key's value in Redis by a specified amount."""
-    redis_client.hincrby(name, key, amount)
+def update_progress(
+    file_id: int | str,
+    increments: dict[str, int] | None = None,
+    values: dict[str, str | int] | None = None,
+    publish: bool = True
+) -> dict[str, str | int]:
+    """Update the progress hashes of a file and read them back in one round
+    trip, then publish the resulting snapshot to the file's channel.
+
+    `increments` and `values` are keyed by PROGRESS_HASHES payload fields.
+    """
+    pipeline = redis_client.pipeline(transaction=False)
+    for field, amount in (increments or {}).items():
+        pipeline.hincrby(PROGRESS_HASHES[field], file_id, amount)
+    for field, value in (values or {}).items():
+        pipeline.hset(PROGRESS_HASHES[field], file_id, value)
+    for name in PROGRESS_HASHES.values():
+        pipeline.hget(name, file_id)
+    event = decode_progress(pipeline.execute()[-len(PROGRESS_HASHES):])
+
+    if publish:
+        redis_client.publish(progress_channel(file_id), json.dumps(event))
+    return event
+
+
+def clear_progress(file_ids: list[int]) -> None:
+    """Drop every progress field of the given files."""
+    if not file_ids:
+        return
+    pipeline = redis_client.pipeline(transaction=False)
+    for name in PROGRESS_HASHES.values():
+        pipeline.hdel(name, *file_ids)
+    pipeline.execute()
+
+
+async def get_progress(file_id: int | str) -> dict[str, str | int]:
+    """Read every progress field of a file in one round trip."""
+    async with async_redis_client.pipeline(transaction=False) as pipeline:
+        for name in PROGRESS_HASHES.values():
+            pipeline.hget(name, file_id)
+        return decode_progress(await pipeline.execute())
+
+
+async def set_progress(file_id: int | str, values: dict[str, str | int]) -> None:
+    """Write several progress fields of a file in one round trip."""
+    async with async_redis_client.pipeline(transaction=False) as pipeline:
+        for field, value in values.items():
+            pipeline.hset(PROGRESS_HASHES[field], file_id, value)
+        await pipeline.execute()
@@ -0,0 +1,270 @@
+"""COPY-based bulk loading of products through a staging table."""
+import csv
+import io
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.import_staging import ImportStagingRow
+from app.utils.metrics import time_stage
+from app.utils.product_cache import product_cache
+
+STAGING_TABLE = "products_staging"
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        ord integer NOT NULL,
+        sku text NOT NULL,
+        name text NOT NULL,
+        description text
+    ) ON COMMIT DELETE ROWS
+"""
+
+# A transaction may load several batches before it commits.
+CLEAR_STAGING_SQL = f"TRUNCATE {STAGING_TABLE}"
+
+COPY_STAGING_SQL = (
+    f"COPY {STAGING_TABLE} (ord, sku, name, description) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+# The last occurrence of a SKU in the chunk wins, same as the row order
+# of the legacy per-batch INSERT ... ON CONFLICT path. Rows whose content is
+# unchanged are not rewritten; xmax = 0 tells inserted rows from updated ones.
+# A NULL description keeps the stored one, and only full-sync imports
+# (activate) switch inactive products back on. The SKUs of the rows written are
+# returned so only those are invalidated in the product cache.
+MERGE_STAGING_SQL = f"""
+    WITH merged AS (
+        INSERT INTO products (sku, name, description)
+        SELECT DISTINCT ON (lower(sku)) sku, name, description
+        FROM {STAGING_TABLE}
+        ORDER BY lower(sku), ord DESC
+        ON CONFLICT (lower(sku)) DO UPDATE
+        SET name = EXCLUDED.name,
+            description = COALESCE(EXCLUDED.description, products.description),
+            active = products.active OR %(activate)s
+        WHERE (products.name, products.description, products.active)
+            IS DISTINCT FROM (
+                EXCLUDED.name,
+                COALESCE(EXCLUDED.description, products.description),
+                products.active OR %(activate)s
+            )
+        RETURNING xmax = 0 AS inserted, lower(sku) AS sku
+    )
+    SELECT count(*) FILTER (WHERE inserted),
+           count(*) FILTER (WHERE NOT inserted),
+           (SELECT count(DISTINCT lower(sku)) FROM {STAGING_TABLE}),
+           COALESCE(array_agg(sku), '{{}}')
+    FROM merged
+"""
+
+IMPORT_STAGING_TABLE = ImportStagingRow.__tablename__
+
+COPY_IMPORT_STAGING_SQL = (
+    f"COPY {IMPORT_STAGING_TABLE} "
+    "(file_id, chunk_index, ord, sku, name, description) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+# Chunks are merged one at a time in file order, each reading only its own
+# rows through the primary key, so a later chunk overwrites an earlier one and
+# the last occurrence of a SKU in the file wins, as across serial batches.
+MERGE_IMPORT_STAGING_SQL = text(f"""
+    WITH chunk AS (
+        SELECT sku, name, description, ord
+        FROM {IMPORT_STAGING_TABLE}
+        WHERE file_id = :file_id AND chunk_index = :chunk_index
+    ), merged AS (
+        INSERT INTO products (sku, name, description)
+        SELECT DISTINCT ON (lower(sku)) sku, name, description
+        FROM chunk
+        ORDER BY lower(sku), ord DESC
+        ON CONFLICT (lower(sku)) DO UPDATE
+        SET name = EXCLUDED.name,
+            description = COALESCE(EXCLUDED.description, products.description),
+            active = products.active OR :activate
+        WHERE (products.name, products.description, products.active)
+            IS DISTINCT FROM (
+                EXCLUDED.name,
+                COALESCE(EXCLUDED.description, products.description),
+                products.active OR :activate
+            )
+        RETURNING xmax = 0 AS inserted, lower(sku) AS sku
+    )
+    SELECT count(*) FILTER (WHERE inserted),
+           count(*) FILTER (WHERE NOT inserted),
+           (SELECT count(DISTINCT lower(sku)) FROM chunk),
+           COALESCE(array_agg(sku), '{{}}')
+    FROM merged
+""")
+
+CLEAR_IMPORT_STAGING_SQL = text(
+    f"DELETE FROM {IMPORT_STAGING_TABLE} WHERE file_id = :file_id"
+)
+
+
+@dataclass
+class UpsertCounts:
+    """Products inserted, updated and left unchanged by an upsert.
+
+    `written_skus` are the lowercase SKUs of the rows written, to be
+    invalidated in the product cache once the transaction commits.
+    """
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    written_skus: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_merge(
+        cls, inserted: int, updated: int, distinct: int, written_skus: list[str]
+    ) -> "UpsertCounts":
+        """Counts from the (inserted, updated, distinct SKUs, SKUs written) a
+        merge returns."""
+        return cls(inserted, updated, distinct - inserted - updated, written_skus)
+
+    def __iadd__(self, other: "UpsertCounts") -> "UpsertCounts":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.written_skus += other.written_skus
+        return self
+
+    def as_progress(self) -> dict[str, int]:
+        """Counts keyed by their progress fields."""
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+        }
+
+
+def commit_upsert(db: Session, counts: UpsertCounts) -> None:
+    """Commit an upsert, then drop the SKUs it wrote from the product cache."""
+    with time_stage("commit"):
+        db.commit()
+    product_cache.invalidate(counts.written_skus)
+
+
+class CopyNull(float):
+    """Written unquoted and empty, which COPY csv reads as NULL.
+
+    QUOTE_NONNUMERIC leaves numbers unquoted, and COPY tells an unquoted
+    empty field (NULL) from a quoted one (empty string).
+    """
+
+    def __str__(self) -> str:
+        return ""
+
+    __repr__ = __str__
+
+
+COPY_NULL = CopyNull()
+
+
+def rows_to_copy_buffer(
+    rows: list[dict[str, str | int | bool | None]],
+    prefix: tuple[int, ...] = (),
+    ord_start: int = 0
+) -> io.StringIO:
+    """Serialize rows into an in-memory CSV buffer for COPY FROM STDIN."""
+    buffer = io.StringIO()
+    # Quoting every string keeps empty strings as "" instead of NULL under
+    # COPY csv; only a missing description is written as COPY_NULL.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for ord_, row in enumerate(rows, start=ord_start):
+        description = row["description"]
+        writer.writerow((
+            *prefix, ord_, row["sku"], row["name"],
+            COPY_NULL if description is None else description
+        ))
+    buffer.seek(0)
+    return buffer
+
+
+def copy_upsert_products(
+    db: Session,
+    rows: list[dict[str, str | int | bool | None]],
+    activate: bool = False,
+    commit: bool = True
+) -> UpsertCounts:
+    """Upsert products by COPYing them into a staging table and merging.
+
+    Without `commit` the caller commits and invalidates the written SKUs.
+    """
+    if not rows:
+        return UpsertCounts()
+
+    buffer = rows_to_copy_buffer(rows)
+    cursor = db.connection().connection.cursor()
+    try:
+        with time_stage("db_upsert"):
+            cursor.execute(CREATE_STAGING_SQL)
+            cursor.execute(CLEAR_STAGING_SQL)
+            cursor.copy_expert(COPY_STAGING_SQL, buffer)
+            cursor.execute(MERGE_STAGING_SQL, {"activate": activate})
+            counts = UpsertCounts.from_merge(*cursor.fetchone())
+        if commit:
+            commit_upsert(db, counts)
+        return counts
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        cursor.close()
+
+
+def copy_rows_to_import_staging(
+    db: Session,
+    file_id: int,
+    chunk_index: int,
+    ord_start: int,
+    rows: list[dict[str, str | int | bool | None]]
+) -> int:
+    """COPY a batch of rows of one file chunk into the import staging table."""
+    if not rows:
+        return 0
+
+    buffer = rows_to_copy_buffer(rows, (file_id, chunk_index), ord_start)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(COPY_IMPORT_STAGING_SQL, buffer)
+        db.commit()
+        return len(rows)
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        cursor.close()
+
+
+def merge_import_staging(
+    db: Session, file_id: int, chunks: int, activate: bool = False
+) -> UpsertCounts:
+    """Merge the staged rows of a file into products, one chunk at a time."""
+    counts = UpsertCounts()
+    for chunk_index in range(chunks):
+        params = {
+            "file_id": file_id, "chunk_index": chunk_index, "activate": activate
+        }
+        chunk_counts = UpsertCounts.from_merge(
+            *db.execute(MERGE_IMPORT_STAGING_SQL, params).one()
+        )
+        db.commit()
+        product_cache.invalidate(chunk_counts.written_skus)
+        # Invalidated already; not kept for the whole file.
+        chunk_counts.written_skus = []
+        counts += chunk_counts
+    return counts
+
+
+def clear_import_staging(db: Session, file_id: int) -> None:
+    """Remove the staged rows of a file."""
+    db.execute(CLEAR_IMPORT_STAGING_SQL, {"file_id": file_id})
+    db.commit()
@@ -0,0 +1,148 @@
+"""Celery tasks processing one large CSV file in parallel byte ranges."""
+from itertools import islice
+
+from app.celery_app import celery_app
+from app.constants.file import S3_BUCKET, FileStatus
+from app.db.connection import get_db
+from app.db.file_process import FileProcessor
+from app.redis import update_progress
+from app.tasks.copy_loader import (
+    clear_import_staging,
+    copy_rows_to_import_staging,
+    merge_import_staging,
+)
+from app.tasks.csv_task import COPY_BATCH_SIZE
+from app.tasks.full_sync import (
+    batch_skus,
+    clear_touched_skus,
+    deactivate_untouched_products,
+    record_staged_skus,
+    record_touched_skus,
+)
+from app.tasks.validation import validate_rows
+from app.utils.aws import create_session
+from app.utils.error_sink import ErrorSink, merge_error_files
+from app.utils.input_readers import CsvReader
+
+
+@celery_app.task(name="process_csv_chunk")
+def process_csv_chunk(
+    file_id: int, file_name: str, chunk_index: int,
+    start: int, end: int, fieldnames: list[str], full_sync: bool = False
+) -> dict[str, int | str]:
+    """Parse one byte range of a CSV file into the import staging table.
+
+    Staged SKUs are recorded for a full sync once all chunks finish; those
+    of rejected rows are recorded here, as they are never staged.
+    """
+    db = next(get_db())
+    s3_client = create_session().client("s3")
+
+    obj = s3_client.get_object(
+        Bucket=S3_BUCKET, Key=file_name, Range=f"bytes={start}-{end - 1}"
+    )
+    reader = CsvReader(obj["Body"], fieldnames, start_offset=start)
+    rows = iter(reader)
+
+    error_sink = ErrorSink(
+        s3_client, f"errors/{file_id}/chunk-{chunk_index}.csv", fieldnames
+    )
+    rows_seen: int = 0
+    staged: int = 0
+    bytes_reported: int = start
+
+    try:
+        while batch := list(islice(rows, COPY_BATCH_SIZE)):
+            rows_seen += len(batch)
+            valid_rows, rejected = validate_rows(batch, fieldnames)
+            for index, reason in rejected:
+                error_sink.write(batch[index], reason)
+            if full_sync and rejected:
+                record_touched_skus(db, file_id, batch_skus(
+                    [batch[index] for index, _ in rejected], fieldnames
+                ))
+
+            staged += copy_rows_to_import_staging(
+                db, file_id, chunk_index, staged, valid_rows
+            )
+            update_progress(file_id, increments={
+                "progress": len(batch),
+                "errors": len(rejected),
+                "bytes_processed": reader.bytes_read - bytes_reported,
+            })
+            bytes_reported = reader.bytes_read
+        error_key = error_sink.close() or ""
+    except Exception:
+        # Otherwise the uploaded parts linger in S3 as an unfinished upload.
+        error_sink.abort()
+        raise
+    finally:
+        db.close()
+
+    return {
+        "chunk_index": chunk_index,
+        "rows": rows_seen,
+        "staged": staged,
+        "errors": error_sink.count,
+        "error_key": error_key,
+    }
+
+
+@celery_app.task(name="finalize_csv_chunks")
+def finalize_csv_chunks(results: list[dict[str, int | str]], file_id: int) -> None:
+    """Merge staged chunks into products and settle the file counters."""
+    db = next(get_db())
+    s3_client = create_session().client("s3")
+    file_processor: FileProcessor | None = db.get(FileProcessor, file_id)
+    if file_processor is None:
+        print(f"FileProcessor record not found for id: {file_id}")
+        return
+
+    results = sorted(results, key=lambda result: result["chunk_index"])
+    counts = merge_import_staging(
+        db, file_id, len(results), file_processor.full_sync
+    )
+    if file_processor.full_sync:
+        record_staged_skus(db, file_id)
+        file_processor.records_deactivated = deactivate_untouched_products(
+            db, file_id, file_processor.products_max_id
+        )
+        clear_touched_skus(db, file_id)
+    clear_import_staging(db, file_id)
+
+    total_rows = sum(result["rows"] for result in results)
+    file_processor.records_inserted = counts.inserted
+    file_processor.records_updated = counts.updated
+    file_processor.records_unchanged = counts.unchanged
+    file_processor.total_number_of_records = total_rows
+    file_processor.rows_with_errors = sum(result["errors"] for result in results)
+
+    error_keys = [result["error_key"] for result in results if result["error_key"]]
+    if error_keys:
+        merge_error_files(s3_client, error_keys, f"errors/{file_id}.csv")
+        file_processor.file_with_errors = f"errors/{file_id}.csv"
+        file_processor.status = FileStatus.COMPLETED_WITH_ERRORS
+    else:
+        file_processor.status = FileStatus.COMPLETED
+
+    db.commit()
+    update_progress(file_id, values={
+        "status": file_processor.status.value,
+        "total": total_rows,
+        "errors": file_processor.rows_with_errors,
+        **counts.as_progress()
+    })
+    db.close()
+
+
+@celery_app.task(name="fail_csv_chunks")
+def fail_csv_chunks(file_id: int) -> None:
+    """Mark a fanned-out file as failed and drop its staged rows."""
+    db = next(get_db())
+    file_processor: FileProcessor | None = db.get(FileProcessor, file_id)
+    clear_import_staging(db, file_id)
+    if file_processor is not None:
+        file_processor.status = FileStatus.FAILED
+        db.commit()
+    update_progress(file_id, values={"status": FileStatus.FAILED.value})
+    db.close()
@@ -1,161 +1,538 @@
 """CSV processing tasks for Celery."""
-import csv
 import os
-import tempfile
 import time
-from typing import List
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterator, Sequence
 
 import boto3
-from sqlalchemy import func, select
+from celery import chord
+from sqlalchemy import func, literal_column, or_, select, text
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
 from app.db.connection import get_db
 from app.db.file_process import FileProcessor
+from app.db.models import engine
 from app.db.products import Product
-from app.redis import increment_redis_data, set_redis_data
+from app.redis import update_progress
 from app.utils.aws import create_session
-from app.constants.file import FileStatus
+from app.constants.file import (
+    FINISHED_STATUSES, S3_BUCKET, FileStatus, InputFormat, LoadMode
+)
+from app.tasks.copy_loader import UpsertCounts, commit_upsert, copy_upsert_products
+from app.tasks.copy_loader import clear_import_staging
+from app.tasks.full_sync import (
+    batch_skus,
+    clear_touched_skus,
+    deactivate_untouched_products,
+    record_touched_skus,
+)
+from app.tasks.rate_control import AdaptiveThrottle
+from app.tasks.validation import validate_rows
+from app.utils.csv_stream import plan_byte_ranges
+from app.utils.input_readers import InputReader, detect_input_format, open_input
+from app.utils.error_sink import (
+    ErrorSink,
+    error_segment_key,
+    list_error_segments,
+    merge_error_files,
+)
+from app.utils.metrics import (
+    IMPORT_BATCH_ROWS,
+    IMPORT_BYTES,
+    IMPORT_FILE_BYTES_PER_SECOND,
+    IMPORT_FILE_ROWS_PER_SECOND,
+    IMPORT_ROWS,
+    collect_timings,
+    record_stage,
+    time_stage,
+)
 
 CHECKPOINT_FOR_DB_COMMIT = 10000
 DB_BATCH_SIZE = 250
+COPY_BATCH_SIZE = 50000
+# (initial, min, max) rows per batch the throttle may choose for each path.
+BATCH_SIZE_LIMITS = {
+    LoadMode.INSERT: (DB_BATCH_SIZE, 50, 5000),
+    LoadMode.COPY: (COPY_BATCH_SIZE, 5000, 200000),
+}
+IMPORT_LOAD_MODE = LoadMode(os.getenv("IMPORT_LOAD_MODE", LoadMode.INSERT.value))
+# Files at least twice this size are split across workers; 0 disables fan-out.
+IMPORT_FANOUT_CHUNK_BYTES = int(os.getenv("IMPORT_FANOUT_CHUNK_BYTES", "0"))
+# Advisory lock keys (namespace, file id) of the worker importing a file.
+IMPORT_LEASE_NAMESPACE = 1
+IMPORT_LEASE_SQL = text(
+    f"SELECT pg_try_advisory_lock({IMPORT_LEASE_NAMESPACE}, :file_id)"
+)
+IMPORT_RELEASE_SQL = text(
+    f"SELECT pg_advisory_unlock({IMPORT_LEASE_NAMESPACE}, :file_id)"
+)
+
+
+def dedupe_rows(
+    rows: list[dict[str, str | int | bool | None]]
+) -> list[dict[str, str | int | bool | None]]:
+    """Keep only the last row for each case-insensitive SKU."""
+    latest: dict[str, dict[str, str | int | bool | None]] = {}
+    for row in rows:
+        key = str(row["sku"]).lower()
+        latest.pop(key, None)
+        latest[key] = row
+    return list(latest.values())
 
 
 def upsert_products(
     db: Session,
-    rows: list[dict[str, str | int | bool | None]]
-) -> int:
-    """Upsert products into the database."""
+    rows: list[dict[str, str | int | bool | None]],
+    activate: bool = False,
+    commit: bool = True
+) -> UpsertCounts:
+    """Upsert products into the database, skipping rows that did not change.
+
+    Only full-sync imports pass `activate`; other writes leave `active` alone.
+    Without `commit` the caller commits and invalidates the written SKUs.
+    """
     if not rows:
-        return 0
-
-    stmt = insert(Product).values(rows)
+        return UpsertCounts()
+
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+    unique_rows = dedupe_rows(rows)
+    stmt = insert(Product).values(unique_rows)
+    set_ = {
+        "name": stmt.excluded.name,
+        # A missing description keeps the stored one.
+        "description": func.coalesce(stmt.excluded.description, Product.description),
+    }
+    changed = [
+        Product.name.is_distinct_from(stmt.excluded.name),
+        Product.description.is_distinct_from(
+            func.coalesce(stmt.excluded.description, Product.description)
+        ),
+    ]
+    if activate:
+        set_["active"] = True
+        changed.append(Product.active.is_(False))
     stmt = stmt.on_conflict_do_update(
-        index_elements=[func.lower(Product.sku)],
-        set_={
-            "name": stmt.excluded.name,
-            "description": stmt.excluded.description,
-        },
-    )
+        index_elements=[func.lower(Product.sku)], set_=set_, where=or_(*changed)
+    ).returning(literal_column("xmax = 0"), func.lower(Product.sku))
 
     try:
-        result = db.execute(stmt)
-        print(result, "rows upserted.")
-        db.commit()
-        return len(rows)
-
+        with time_stage("db_upsert"):
+            written = db.execute(stmt).all()
+        inserted = sum(inserted for inserted, _ in written)
+        # Unchanged rows are not returned and stay cached.
+        counts = UpsertCounts.from_merge(
+            inserted, len(written) - inserted, len(unique_rows),
+            [sku for _, sku in written]
+        )
+        if commit:
+            commit_upsert(db, counts)
     except Exception:
         db.rollback()
         raise
+    return counts
 
-def count_total_rows(
-    s3_client: boto3.client,
-    file_name: str
-) -> int:
-    """Count total rows in a CSV file from S3."""
-    obj = s3_client.get_object(
-        Bucket="temp-csv-files-product-importer",
-        Key=file_name
-    )
 
-    total_rows = sum(1 for _ in obj["Body"].iter_lines()) - 1  # minus header
-    return total_rows
+def load_products(
+    db: Session,
+    rows: list[dict[str, str | int | bool | None]],
+    load_mode: LoadMode,
+    activate: bool = False,
+    commit: bool = True
+) -> UpsertCounts:
+    """Upsert a batch of products using the configured load path."""
+    if load_mode == LoadMode.COPY:
+        return copy_upsert_products(db, rows, activate, commit)
+    return upsert_products(db, rows, activate, commit)
+
+
+@dataclass
+class PendingCounts:
+    """Counters of the batches loaded since the last checkpoint."""
+    processed: int = 0
+    errors: int = 0
+    counts: UpsertCounts = field(default_factory=UpsertCounts)
+
+
+class ImportTimings:
+    """Stage seconds and throughput of a file, summed over all of its runs."""
+
+    def __init__(self, previous: dict, rows_at_start: int, bytes_at_start: int) -> None:
+        self.started_at = time.perf_counter()
+        self.previous_seconds: float = previous.get("seconds", 0.0)
+        self.stage_seconds: dict[str, float] = dict(previous.get("stages", {}))
+        self.rows_at_start = rows_at_start
+        self.bytes_at_start = bytes_at_start
+
+    def elapsed(self) -> float:
+        """Seconds since this run started."""
+        return time.perf_counter() - self.started_at
+
+    def summary(
+        self, rows_seen: int, bytes_read: int
+    ) -> dict[str, float | dict[str, float]]:
+        """Stage breakdown and throughput of the file, as stored on its record."""
+        run_seconds = max(self.elapsed(), 1e-6)
+        return {
+            "stages": {
+                stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()
+            },
+            "seconds": round(self.previous_seconds + run_seconds, 3),
+            "rows_per_second": round((rows_seen - self.rows_at_start) / run_seconds, 1),
+            "bytes_per_second": round(
+                (bytes_read - self.bytes_at_start) / run_seconds, 1
+            ),
+        }
+
+
+class ProgressReporter:
+    """Pushes the counters of an import run to Redis and Prometheus."""
+
+    def __init__(self, file_id: int, reader: InputReader, rows_seen: int) -> None:
+        self.file_id = file_id
+        self.reader = reader
+        self.rows_seen = rows_seen
+        self.bytes_counted = reader.bytes_read
+        # Rejected rows are added to the Redis counter with the next update.
+        self.errors_unreported = 0
+
+    def report(self, rows_processed: int, counts: UpsertCounts) -> None:
+        """Push counters gathered since the last update in one round trip."""
+        IMPORT_ROWS.labels("accepted").inc(rows_processed)
+        IMPORT_ROWS.labels("rejected").inc(self.errors_unreported)
+        IMPORT_BYTES.inc(self.reader.bytes_read - self.bytes_counted)
+        self.bytes_counted = self.reader.bytes_read
+        with time_stage("redis_update"):
+            update_progress(
+                self.file_id,
+                increments={
+                    # Rejected rows count as processed, too.
+                    "progress": rows_processed + self.errors_unreported,
+                    "errors": self.errors_unreported,
+                    **counts.as_progress(),
+                },
+                values={"bytes_processed": self.reader.bytes_read},
+            )
+        self.errors_unreported = 0
+
+    def finish(self) -> None:
+        """Push the last rejected rows and the settled row total."""
+        update_progress(
+            self.file_id,
+            increments={
+                "progress": self.errors_unreported, "errors": self.errors_unreported
+            },
+            values={"total": self.rows_seen, "bytes_processed": self.reader.bytes_read},
+            publish=False,
+        )
+
+
+class FileImport:
+    """One run of a serial file import, resumed from the file's checkpoint.
+
+    Counters are committed to the file record with the reader offset at each
+    checkpoint, so a retried plain CSV only re-reads the bytes after the last
+    committed batch.
+    """
+
+    def __init__(
+        self, file_processor: FileProcessor, db: Session, s3_client: boto3.client,
+        load_mode: LoadMode, input_format: InputFormat
+    ) -> None:
+        self.file_processor = file_processor
+        self.db = db
+        self.s3_client = s3_client
+        self.load_mode = load_mode
+        self.reader = open_input(
+            s3_client, file_processor.file_name, input_format,
+            file_processor.checkpoint_offset, file_processor.checkpoint_row
+        )
+        self.throttle = AdaptiveThrottle(db, *BATCH_SIZE_LIMITS[load_mode])
+        # Stage seconds add up over every run of the file.
+        self.timings = ImportTimings(
+            file_processor.timings or {}, file_processor.checkpoint_row,
+            self.reader.bytes_read
+        )
+        self.progress = ProgressReporter(
+            file_processor.id, self.reader, file_processor.checkpoint_row
+        )
+        # Error rows are written in one segment per checkpoint so the rows
+        # rejected before a crash survive a resume.
+        self.error_sink = self.new_error_sink()
+
+    def new_error_sink(self) -> ErrorSink:
+        """Error segment for the rows after the current position."""
+        return ErrorSink(
+            self.s3_client,
+            error_segment_key(self.file_processor.id, self.progress.rows_seen),
+            self.reader.fieldnames,
+        )
+
+    def run(self) -> None:
+        """Load every remaining row, then deactivate products for a full sync."""
+        file_processor = self.file_processor
+        update_progress(file_processor.id, values={
+            "status": FileStatus.PROCESSING.value,
+            "progress": file_processor.checkpoint_row,
+            "errors": file_processor.rows_with_errors,
+            "inserted": file_processor.records_inserted,
+            "updated": file_processor.records_updated,
+            "unchanged": file_processor.records_unchanged,
+            "bytes_processed": self.reader.bytes_read,
+        })
+
+        rows = iter(self.reader)
+        pending = PendingCounts()
+        try:
+            with collect_timings(self.timings.stage_seconds):
+                while batch := self.read_batch(rows):
+                    self.load_batch(batch, pending)
+                    if pending.processed + pending.errors >= CHECKPOINT_FOR_DB_COMMIT:
+                        pending = self.checkpoint(pending)
+
+            # The upload-time count is an estimate (quoted newlines); settle it now.
+            file_processor.total_number_of_records = self.progress.rows_seen
+            self.checkpoint(pending)
+        except Exception:
+            self.error_sink.abort()
+            raise
+
+        self.progress.finish()
+        if file_processor.full_sync:
+            with collect_timings(self.timings.stage_seconds), time_stage("deactivate"):
+                file_processor.records_deactivated = deactivate_untouched_products(
+                    self.db, file_processor.id, file_processor.products_max_id
+                )
+            clear_touched_skus(self.db, file_processor.id)
+        file_processor.timings = self.summary()
+
+    def read_batch(self, rows: Iterator[Sequence[str | None]]) -> list[Sequence[str | None]]:
+        """Pull the next batch, splitting S3 wait from parsing time."""
+        pull_started_at = time.perf_counter()
+        read_seconds_before = self.reader.read_seconds
+        batch = list(islice(rows, self.throttle.batch_size))
+        read_seconds = self.reader.read_seconds - read_seconds_before
+        record_stage("s3_read", read_seconds)
+        record_stage("csv_parse", time.perf_counter() - pull_started_at - read_seconds)
+        return batch
+
+    def load_batch(self, batch: list[Sequence[str | None]], pending: PendingCounts) -> None:
+        """Validate and load one batch, recording its rejected rows.
+
+        Rows are validated a whole batch at a time, column by column, instead
+        of being normalized one dict at a time.
+        """
+        file_processor = self.file_processor
+        fieldnames = self.reader.fieldnames
+        self.progress.rows_seen += len(batch)
+        IMPORT_BATCH_ROWS.observe(len(batch))
+        with time_stage("validation"):
+            valid_rows, rejected = validate_rows(batch, fieldnames)
+        for index, reason in rejected:
+            self.error_sink.write(batch[index], reason)
+        pending.errors += len(rejected)
+        self.progress.errors_unreported += len(rejected)
+        # Rows superseded by a later duplicate count as processed.
+        accepted = len(batch) - len(rejected)
+
+        counts = UpsertCounts()
+        if valid_rows:
+            # Only the database write is timed, against a target scaled by
+            # the batch size.
+            batch_started_at = time.perf_counter()
+            counts = load_products(
+                self.db, valid_rows, self.load_mode, file_processor.full_sync,
+                commit=False
+            )
+            self.throttle.record_batch(
+                time.perf_counter() - batch_started_at, len(valid_rows)
+            )
+            self.throttle.wait(len(valid_rows))
+        if file_processor.full_sync:
+            # Rejected rows count too: their products stay active.
+            # Committed with the next checkpoint, so a resumed import
+            # never misses a SKU read before it.
+            record_touched_skus(
+                self.db, file_processor.id, batch_skus(batch, fieldnames),
+                commit=False
+            )
+        self.progress.report(accepted, counts)
+        pending.processed += accepted
+        pending.counts += counts
+
+    def checkpoint(self, pending: PendingCounts) -> PendingCounts:
+        """Commit the batches loaded since the last checkpoint together with
+        their counters and the offset the next run resumes from.
+
+        A crash before the commit rolls all of them back, so a resumed run
+        loads them again and counts every row once. Returns the counters for
+        the batches after the checkpoint.
+        """
+        file_processor = self.file_processor
+        self.error_sink.close()
+        file_processor.records_inserted += pending.counts.inserted
+        file_processor.records_updated += pending.counts.updated
+        file_processor.records_unchanged += pending.counts.unchanged
+        file_processor.rows_with_errors += pending.errors
+        file_processor.checkpoint_offset = self.reader.bytes_read
+        file_processor.checkpoint_row = self.progress.rows_seen
+        file_processor.timings = self.summary()
+        with collect_timings(self.timings.stage_seconds):
+            commit_upsert(self.db, pending.counts)
+        self.error_sink = self.new_error_sink()
+        return PendingCounts()
+
+    def summary(self) -> dict[str, float | dict[str, float]]:
+        """Timings of the file up to the current position."""
+        return self.timings.summary(self.progress.rows_seen, self.reader.bytes_read)
 
 
 def process_csv_task(
     file_name: str, file_processor: FileProcessor,
-    db: Session, s3_client: boto3.client
+    db: Session, s3_client: boto3.client,
+    load_mode: LoadMode = IMPORT_LOAD_MODE,
+    input_format: InputFormat = InputFormat.CSV
 ) -> None:
-    """Process CSV file and insert/update products."""
-    obj = s3_client.get_object(
-        Bucket="temp-csv-files-product-importer",
-        Key=file_name
-    )
-
-    reader = csv.DictReader(
-        (line.decode("utf-8") for line in obj["Body"].iter_lines())
-    )
-
-    rows_to_insert: list[dict] = []
-    processed_since_checkout: int = 0
-    set_redis_data("file_status", file_processor.id, FileStatus.PROCESSING)
-    rows_with_errors: list[dict] = []
-
-    for row in reader:
-        new_row = {
-            "sku": row.get("sku", "").strip(),
-            "name": row.get("name", "").strip(),
-            "description": row.get("description", "").strip()
-        }
-        if not new_row["sku"]:
-            rows_with_errors.append(row)
-            increment_redis_data("row_with_errors", file_processor.id, 1)
-            continue
-
-        rows_to_insert.append(new_row)
-
-        if len(rows_to_insert) >= DB_BATCH_SIZE:
-            rows_updated = upsert_products(db, rows_to_insert)
-            increment_redis_data("file_processing", file_processor.id, rows_updated)
-            processed_since_checkout += rows_updated
-            rows_to_insert.clear()
-            time.sleep(3)
-
-            if processed_since_checkout >= CHECKPOINT_FOR_DB_COMMIT:
-                file_processor.records_inserted += processed_since_checkout
-                processed_since_checkout = 0
-                db.commit()
-
-    if rows_to_insert:
-        rows_updated = upsert_products(db, rows_to_insert)
-        increment_redis_data("file_processing", file_processor.id, rows_updated)
-        processed_since_checkout += rows_updated
-        file_processor.records_inserted += processed_since_checkout
-        db.commit()
-
-    if rows_with_errors:
-        handle_error_file(rows_with_errors, s3_client, db, file_processor)
-    else:
-        file_processor.status = FileStatus.COMPLETED
+    """Process an import file and insert/update products.
+
+    Work resumes from the last checkpoint stored on the file processor.
+    """
+    file_import = FileImport(file_processor, db, s3_client, load_mode, input_format)
+    file_import.run()
+    timings = file_processor.timings
+    IMPORT_FILE_ROWS_PER_SECOND.observe(timings["rows_per_second"])
+    IMPORT_FILE_BYTES_PER_SECOND.observe(timings["bytes_per_second"])
+    print(f"Imported {file_name} ({input_format.value}): "
+          f"{file_import.progress.rows_seen} rows, "
+          f"{file_import.reader.bytes_read} bytes read from S3 "
+          f"in {file_import.timings.elapsed():.1f}s, stages {timings['stages']}")
+    handle_error_file(s3_client, db, file_processor)
 
 
 def handle_error_file(
-    rows_with_errors: List[dict],
     s3_client: boto3.client,
     db: Session,
     file_processor: FileProcessor
 ) -> None:
-    """Handle error rows by creating a CSV file and uploading to S3."""
-    if not rows_with_errors:
-        return
-
-    with tempfile.NamedTemporaryFile(
-        mode="w",
-        newline="",
-        suffix=".csv",
-        delete=False
-    ) as error_file:
-        fieldnames = ["sku", "name", "description"]
-        writer = csv.DictWriter(error_file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows_with_errors)
-        temp_path = error_file.name
-
-    s3_client.upload_file(
-        Filename=temp_path,
-        Bucket="temp-csv-files-product-importer",
-        Key=f"errors/{file_processor.id}.csv",
-    )
-    file_processor.file_with_errors = f"errors/{file_processor.id}.csv"
-    file_processor.status = FileStatus.COMPLETED_WITH_ERRORS
+    """Combine the error segments of a file and record the final file status.
+
+    The status follows the committed error count: a run resumed after the
+    segments were merged finds none left and keeps the merged error file.
+    """
+    error_key = f"errors/{file_processor.id}.csv"
+    segment_keys = list_error_segments(s3_client, file_processor.id)
+    if segment_keys:
+        merge_error_files(s3_client, segment_keys, error_key)
+        file_processor.file_with_errors = error_key
+    elif file_processor.rows_with_errors and not file_processor.file_with_errors:
+        # Merged by a run that stopped before committing the status.
+        file_processor.file_with_errors = error_key
+    if file_processor.rows_with_errors:
+        file_processor.status = FileStatus.COMPLETED_WITH_ERRORS
+    else:
+        file_processor.status = FileStatus.COMPLETED
     db.commit()
 
-    os.remove(temp_path)
+
+@contextmanager
+def import_lease(file_id: int) -> Iterator[bool]:
+    """Hold an advisory lock on a file for the enclosed import.
+
+    Yields False when another worker already imports the file. The lock
+    lives on its own connection, so it is released with that connection
+    when a worker dies and the redelivered task can take it over.
+    """
+    with engine.connect() as connection:
+        leased = connection.execute(
+            IMPORT_LEASE_SQL, {"file_id": file_id}
+        ).scalar()
+        # Session-level locks outlive the transaction; do not sit idle in one.
+        connection.commit()
+        try:
+            yield leased
+        finally:
+            if leased:
+                connection.execute(IMPORT_RELEASE_SQL, {"file_id": file_id})
+                connection.commit()
+
+
+def reset_file_progress(db: Session, file_processor: FileProcessor) -> None:
+    """Zero the counters and checkpoint of a file so its import starts over."""
+    file_processor.records_inserted = 0
+    file_processor.records_updated = 0
+    file_processor.records_unchanged = 0
+    file_processor.records_deactivated = 0
+    file_processor.rows_with_errors = 0
+    file_processor.file_with_errors = ""
+    file_processor.checkpoint_offset = 0
+    file_processor.checkpoint_row = 0
+    file_processor.timings = {}
+    clear_touched_skus(db, file_processor.id)
+
+
+def dispatch_csv_chunks(
+    file_processor: FileProcessor,
+    db: Session,
+    s3_client: boto3.client,
+    size: int
+) -> bool:
+    """Fan a large file out to parallel chunk tasks joined by a chord.
+
+    Returns False when the file should be processed serially instead: it is
+    too small, or a quoted field may span lines, so a newline is not
+    necessarily a record boundary.
+    """
+    if not IMPORT_FANOUT_CHUNK_BYTES or size < 2 * IMPORT_FANOUT_CHUNK_BYTES:
+        return False
+    if not file_processor.single_line_rows:
+        print(f"{file_processor.file_name} may have quoted line breaks, "
+              "processing serially")
+        return False
+
+    plan = plan_byte_ranges(
+        s3_client, file_processor.file_name, size, IMPORT_FANOUT_CHUNK_BYTES
+    )
+    if plan is None:
+        print(f"No line boundaries found in {file_processor.file_name}, "
+              "processing serially")
+        return False
+
+    fieldnames, ranges = plan
+    clear_import_staging(db, file_processor.id)
+    update_progress(
+        file_processor.id,
+        values={
+            "status": FileStatus.PROCESSING.value,
+            "progress": 0, "errors": 0, "bytes_processed": 0,
+            "inserted": 0, "updated": 0, "unchanged": 0,
+        },
+    )
+    # Tasks are referenced by name; app.tasks.csv_fanout imports this module.
+    header = [
+        celery_app.signature(
+            "process_csv_chunk",
+            args=(file_processor.id, file_processor.file_name,
+                  chunk_index, start, end, fieldnames, file_processor.full_sync),
+        )
+        for chunk_index, (start, end) in enumerate(ranges)
+    ]
+    body = celery_app.signature(
+        "finalize_csv_chunks", args=(file_processor.id,)
+    ).on_error(
+        celery_app.signature("fail_csv_chunks", args=(file_processor.id,),
+                             immutable=True)
+    )
+    chord(header)(body)
+    return True
 
 
-@celery_app.task(bind=True, name="process_csv")
-def process_csv(self, file_name: str) -> None:  # pylint: disable=unused-argument
+# acks_late re-delivers the task after a worker crash or redeploy, and the
+# stored checkpoint lets the new run continue where the old one stopped.
+@celery_app.task(name="process_csv", acks_late=True, reject_on_worker_lost=True)
+def process_csv(file_name: str, load_mode: str | None = None) -> None:
     """Celery task to process a CSV file."""
     db = next(get_db())
     session: boto3.Session = create_session()
@@ -169,28 +546,66 @@ def process_csv(self, file_name: str) -> None:  # pylint: disable=unused-argumen
         print(f"FileProcessor record not found for file: {file_name}")
         return
 
+    with import_lease(file_processor.id) as leased:
+        if not leased:
+            print(f"{file_name} is being imported by another worker, skipping")
+            return
+        # The holder of the lease before us may have advanced the file.
+        db.refresh(file_processor)
+        import_file(file_name, file_processor, db, s3_client, load_mode)
+
+
+def import_file(
+    file_name: str, file_processor: FileProcessor, db: Session,
+    s3_client: boto3.client, load_mode: str | None
+) -> None:
+    """Import a file, serially or fanned out, while holding its lease."""
+    if file_processor.status in FINISHED_STATUSES:
+        # A redelivery after the import finished; a deliberate retry resets
+        # the file first.
+        print(f"{file_name} is already processed, skipping")
+        return
+
     file_processor.status = FileStatus.PROCESSING
+    if not file_processor.checkpoint_offset:
+        reset_file_progress(db, file_processor)
     db.commit()
 
-    # =========================
-    # PASS 1: COUNT TOTAL ROWS
-    # =========================
-    total_rows = count_total_rows(s3_client, file_name)
-    file_processor.total_number_of_records = total_rows
-    set_redis_data(
-        name="file_total",
-        key=str(file_processor.id),
-        value=str(total_rows),
+    # Progress is reported in bytes so no pre-pass over the object is needed;
+    # the row total comes from the count taken while the file was uploaded.
+    head = s3_client.head_object(Bucket=S3_BUCKET, Key=file_name)
+    update_progress(
+        file_processor.id,
+        values={
+            "bytes_total": head["ContentLength"],
+            "total": file_processor.total_number_of_records,
+        },
+        publish=False,
     )
 
+    input_format = detect_input_format(s3_client, file_name)
+    # Parallel chunks are not checkpointed; a resumed file continues serially.
+    # Only plain CSV can be split into byte ranges.
+    if (
+        input_format == InputFormat.CSV
+        and not file_processor.checkpoint_offset
+        and dispatch_csv_chunks(file_processor, db, s3_client, head["ContentLength"])
+    ):
+        return
 
-    # =========================
-    # PASS 2: PROCESS ROWS
-    # =========================
     try:
-        process_csv_task(file_name, file_processor, db, s3_client)
-    except Exception:
-        file_processor.status = "error"
+        process_csv_task(
+            file_name, file_processor, db, s3_client,
+            LoadMode(load_mode) if load_mode else IMPORT_LOAD_MODE,
+            input_format
+        )
+    except Exception as exc:
+        print(f"Processing {file_name} failed: {exc}")
+        db.rollback()
+        file_processor.status = FileStatus.FAILED
+        update_progress(
+            file_processor.id, values={"status": FileStatus.FAILED.value}
+        )
     else:
-        set_redis_data("file_status", file_processor.id, "completed")
+        update_progress(file_processor.id, values={"status": "completed"})
     db.commit()
@@ -0,0 +1,110 @@
+"""Archival of old finished file records and their S3 objects."""
+import os
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+from sqlalchemy import select, text
+
+from app.celery_app import celery_app
+from app.constants.file import FINISHED_STATUSES, S3_BUCKET
+from app.db.connection import get_db
+from app.db.file_process import FileProcessor, FileProcessorArchive
+from app.redis import clear_progress
+from app.utils.aws import create_session
+
+# Finished files older than this are archived; 0 disables the job.
+FILE_RETENTION_DAYS = int(os.getenv("FILE_RETENTION_DAYS", "90"))
+FILE_ARCHIVE_BATCH_SIZE = int(os.getenv("FILE_ARCHIVE_BATCH_SIZE", "100"))
+FILE_ARCHIVE_STORAGE_CLASS = os.getenv("FILE_ARCHIVE_STORAGE_CLASS", "GLACIER_IR")
+ARCHIVE_PREFIX = "archive/"
+
+ARCHIVE_FILES_SQL = text(f"""
+    WITH moved AS (
+        DELETE FROM {FileProcessor.__tablename__}
+        WHERE id = ANY(:ids)
+        RETURNING *
+    )
+    INSERT INTO {FileProcessorArchive.__tablename__} (
+        id, file_name, status, total_number_of_records, records_inserted,
+        records_updated, records_unchanged, records_deactivated,
+        rows_with_errors, file_key, file_with_errors, created_at
+    )
+    SELECT
+        id, file_name, status::text, total_number_of_records, records_inserted,
+        records_updated, records_unchanged, records_deactivated,
+        rows_with_errors,
+        :prefix || id || '/' || file_name,
+        CASE WHEN file_with_errors = '' THEN ''
+             ELSE :prefix || id || '/' || file_with_errors END,
+        created_at
+    FROM moved
+""")
+
+
+def archive_key(file_id: int, key: str) -> str:
+    """S3 key an object of an archived file is moved to."""
+    return f"{ARCHIVE_PREFIX}{file_id}/{key}"
+
+
+def copy_to_archive(s3_client, file_id: int, key: str) -> None:
+    """Copy an object under the archive prefix, unless it does not exist."""
+    try:
+        s3_client.head_object(Bucket=S3_BUCKET, Key=key)
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return
+        raise
+    # Managed copy, since uploads can exceed the 5 GB single-copy limit.
+    s3_client.copy(
+        {"Bucket": S3_BUCKET, "Key": key},
+        S3_BUCKET,
+        archive_key(file_id, key),
+        ExtraArgs={"StorageClass": FILE_ARCHIVE_STORAGE_CLASS},
+    )
+
+
+@celery_app.task(name="archive_finished_files")
+def archive_finished_files() -> int:
+    """Move finished files older than FILE_RETENTION_DAYS to the archive.
+
+    Each batch is locked with SKIP LOCKED, its objects are copied in S3 and
+    the rows are moved in one statement. The originals are deleted only
+    once that commits, so a batch that fails earlier leaves every record
+    pointing at an existing object and is simply redone by the next run.
+    """
+    if FILE_RETENTION_DAYS <= 0:
+        return 0
+    db = next(get_db())
+    s3_client = create_session().client("s3")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=FILE_RETENTION_DAYS)
+    archived = 0
+    while True:
+        rows = db.execute(
+            select(FileProcessor.id, FileProcessor.file_name, FileProcessor.file_with_errors)
+            .where(
+                FileProcessor.status.in_(FINISHED_STATUSES),
+                FileProcessor.created_at < cutoff,
+            )
+            .order_by(FileProcessor.id)
+            .limit(FILE_ARCHIVE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            break
+        keys = [
+            (row.id, key)
+            for row in rows
+            for key in (row.file_name, row.file_with_errors) if key
+        ]
+        for file_id, key in keys:
+            copy_to_archive(s3_client, file_id, key)
+        file_ids = [row.id for row in rows]
+        db.execute(ARCHIVE_FILES_SQL, {"ids": file_ids, "prefix": ARCHIVE_PREFIX})
+        db.commit()
+        for _, key in keys:
+            s3_client.delete_object(Bucket=S3_BUCKET, Key=key)
+        clear_progress(file_ids)
+        archived += len(rows)
+    db.close()
+    print(f"Archived {archived} files finished over {FILE_RETENTION_DAYS} days ago")
+    return archived
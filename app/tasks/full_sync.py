@@ -0,0 +1,114 @@
+"""Deactivation of products missing from a full-catalogue import."""
+import os
+from typing import Sequence
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.import_staging import ImportStagingRow, ImportTouchedSku
+from app.db.products import Product
+from app.utils.product_cache import product_cache
+
+# Products scanned per deactivation statement, each in its own transaction,
+# so no statement locks a large part of the table for long.
+DEACTIVATE_CHUNK_SIZE = int(os.getenv("IMPORT_DEACTIVATE_CHUNK_SIZE", "10000"))
+
+TOUCHED_TABLE = ImportTouchedSku.__tablename__
+
+RECORD_TOUCHED_SQL = text(f"""
+    INSERT INTO {TOUCHED_TABLE} (file_id, sku)
+    SELECT :file_id, unnest(CAST(:skus AS text[]))
+    ON CONFLICT DO NOTHING
+""")
+
+RECORD_STAGED_SQL = text(f"""
+    INSERT INTO {TOUCHED_TABLE} (file_id, sku)
+    SELECT DISTINCT file_id, lower(sku)
+    FROM {ImportStagingRow.__tablename__}
+    WHERE file_id = :file_id
+    ON CONFLICT DO NOTHING
+""")
+
+DEACTIVATE_UNTOUCHED_SQL = text(f"""
+    UPDATE products
+    SET active = false
+    WHERE id >= :start AND id < :end
+      AND active
+      AND NOT EXISTS (
+          SELECT 1 FROM {TOUCHED_TABLE}
+          WHERE file_id = :file_id AND sku = lower(products.sku)
+      )
+    RETURNING lower(sku)
+""")
+
+CLEAR_TOUCHED_SQL = text(f"DELETE FROM {TOUCHED_TABLE} WHERE file_id = :file_id")
+
+
+def batch_skus(
+    rows: Sequence[Sequence[str | None]], fieldnames: Sequence[str]
+) -> list[str]:
+    """Non-empty SKUs of parsed rows, whether or not they passed validation."""
+    if "sku" not in fieldnames:
+        return []
+    index = fieldnames.index("sku")
+    skus = (row[index] for row in rows if index < len(row) and row[index])
+    return [sku for sku in map(str.strip, skus) if sku]
+
+
+def record_touched_skus(
+    db: Session, file_id: int, skus: list[str], commit: bool = True
+) -> None:
+    """Remember the SKUs read by a full-sync import."""
+    if not skus:
+        return
+    db.execute(
+        RECORD_TOUCHED_SQL,
+        {"file_id": file_id, "skus": sorted({sku.lower() for sku in skus})}
+    )
+    if commit:
+        db.commit()
+
+
+def record_staged_skus(db: Session, file_id: int) -> None:
+    """Remember every SKU staged by the parallel chunks of a file."""
+    db.execute(RECORD_STAGED_SQL, {"file_id": file_id})
+    db.commit()
+
+
+def deactivate_untouched_products(
+    db: Session, file_id: int, products_max_id: int | None = None
+) -> int:
+    """Deactivate active products whose SKU the import did not contain.
+
+    Runs over id ranges of DEACTIVATE_CHUNK_SIZE, committing after each,
+    up to `products_max_id`, the highest id when the file was uploaded.
+    Nothing is deactivated when the import loaded no SKU at all, so an empty
+    or unreadable file cannot switch off the whole catalogue.
+    """
+    touched = db.execute(
+        select(func.count()).select_from(ImportTouchedSku)
+        .where(ImportTouchedSku.file_id == file_id)
+    ).scalar()
+    if not touched:
+        return 0
+
+    min_id, max_id = db.execute(select(func.min(Product.id), func.max(Product.id))).one()
+    if products_max_id is not None and max_id is not None:
+        max_id = min(max_id, products_max_id)
+    deactivated = 0
+    end_id = (max_id or -1) + 1
+    for start in range(min_id or 0, end_id, DEACTIVATE_CHUNK_SIZE):
+        skus = db.execute(DEACTIVATE_UNTOUCHED_SQL, {
+            "file_id": file_id, "start": start,
+            "end": min(start + DEACTIVATE_CHUNK_SIZE, end_id)
+        }).scalars().all()
+        db.commit()
+        product_cache.invalidate(skus)
+        deactivated += len(skus)
+    return deactivated
+
+
+def clear_touched_skus(db: Session, file_id: int) -> None:
+    """Remove the SKUs recorded for a file."""
+    db.execute(CLEAR_TOUCHED_SQL, {"file_id": file_id})
+    db.commit()
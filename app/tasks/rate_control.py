@@ -0,0 +1,116 @@
+"""Adaptive rate control for batched product imports."""
+import os
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# 0 disables the corresponding limit.
+IMPORT_MAX_ROWS_PER_SEC_FILE = float(os.getenv("IMPORT_MAX_ROWS_PER_SEC_FILE", "0"))
+IMPORT_MAX_ROWS_PER_SEC_WORKER = float(os.getenv("IMPORT_MAX_ROWS_PER_SEC_WORKER", "0"))
+
+TARGET_COMMIT_SECONDS = float(os.getenv("IMPORT_TARGET_COMMIT_SECONDS", "0.5"))
+# Rows a batch may write within TARGET_COMMIT_SECONDS; larger batches get a
+# proportionally longer target, so COPY batches are not held to the latency
+# of a small INSERT batch.
+TARGET_COMMIT_ROWS = int(os.getenv("IMPORT_TARGET_COMMIT_ROWS", "250"))
+MAX_REPLICATION_LAG_SECONDS = float(os.getenv("IMPORT_MAX_REPLICATION_LAG_SECONDS", "5"))
+MAX_LOCK_WAITERS = int(os.getenv("IMPORT_MAX_LOCK_WAITERS", "10"))
+MAX_BATCH_DELAY_SECONDS = 5.0
+HEALTH_CHECK_INTERVAL_SECONDS = 5.0
+
+REPLICATION_LAG_SQL = text(
+    "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) "
+    "FROM pg_stat_replication"
+)
+LOCK_WAITERS_SQL = text("SELECT COUNT(*) FROM pg_locks WHERE NOT granted")
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting rows per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: int) -> None:
+        """Block until `amount` rows may pass the limit."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.rate, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+# Shared by every import running in this worker process.
+worker_bucket: TokenBucket | None = (
+    TokenBucket(IMPORT_MAX_ROWS_PER_SEC_WORKER)
+    if IMPORT_MAX_ROWS_PER_SEC_WORKER > 0 else None
+)
+
+
+class AdaptiveThrottle:
+    """Grow or shrink batch size and inter-batch delay based on DB feedback.
+
+    Batches written well under the target latency for their size grow the
+    batch size additively, slow batches or a stressed database (replication lag, lock
+    waiters) halve it and back off with a delay between batches.
+    """
+
+    def __init__(
+        self, db: Session, initial_batch: int, min_batch: int, max_batch: int,
+        max_rows_per_sec: float = IMPORT_MAX_ROWS_PER_SEC_FILE
+    ) -> None:
+        self.db = db
+        self.batch_size = initial_batch
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.step = max(min_batch // 2, 1)
+        self.delay = 0.0
+        self.file_bucket = (
+            TokenBucket(max_rows_per_sec) if max_rows_per_sec > 0 else None
+        )
+        self.last_health_check = 0.0
+        self.under_pressure = False
+
+    def db_under_pressure(self) -> bool:
+        """Check replication lag and lock waiters, sampled periodically."""
+        now = time.monotonic()
+        if now - self.last_health_check < HEALTH_CHECK_INTERVAL_SECONDS:
+            return self.under_pressure
+        self.last_health_check = now
+
+        replication_lag = float(self.db.execute(REPLICATION_LAG_SQL).scalar() or 0)
+        lock_waiters = int(self.db.execute(LOCK_WAITERS_SQL).scalar() or 0)
+        self.under_pressure = (
+            replication_lag > MAX_REPLICATION_LAG_SECONDS
+            or lock_waiters > MAX_LOCK_WAITERS
+        )
+        return self.under_pressure
+
+    def record_batch(self, write_seconds: float, rows: int) -> None:
+        """Adjust batch size and delay after a batch of `rows` was written."""
+        target = TARGET_COMMIT_SECONDS * max(rows / TARGET_COMMIT_ROWS, 1.0)
+        if write_seconds > target or self.db_under_pressure():
+            self.batch_size = max(self.min_batch, self.batch_size // 2)
+            self.delay = min(MAX_BATCH_DELAY_SECONDS, max(self.delay * 2, 0.1))
+        elif write_seconds < target / 2:
+            self.batch_size = min(self.max_batch, self.batch_size + self.step)
+            self.delay = self.delay / 2 if self.delay > 0.01 else 0.0
+
+    def wait(self, rows: int) -> None:
+        """Apply the inter-batch delay and the configured rows/s limits."""
+        if self.delay:
+            time.sleep(self.delay)
+        if self.file_bucket:
+            self.file_bucket.acquire(rows)
+        if worker_bucket:
+            worker_bucket.acquire(rows)
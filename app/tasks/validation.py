@@ -0,0 +1,211 @@
+"""Column-oriented validation and normalization of import batches."""
+import os
+from operator import itemgetter
+from typing import Callable, Sequence
+
+PRODUCT_COLUMNS = ("sku", "name", "description")
+# Columns whose missing values are loaded as NULL, keeping the stored value.
+NULLABLE_COLUMNS = ("description",)
+MISSING_SKU_REASON = "missing sku"
+DUPLICATE_SKU_REASON = "duplicate sku, superseded by a later row"
+INVALID_ENCODING_REASON = "invalid utf-8 in {column}"
+MAX_LENGTHS = {
+    "sku": int(os.getenv("IMPORT_MAX_SKU_LENGTH", "100")),
+    "name": int(os.getenv("IMPORT_MAX_NAME_LENGTH", "500")),
+    "description": int(os.getenv("IMPORT_MAX_DESCRIPTION_LENGTH", "10000")),
+}
+# With strict duplicates every earlier row of a SKU repeated within a batch
+# is reported as an error instead of being silently superseded.
+IMPORT_STRICT_DUPLICATES = os.getenv("IMPORT_STRICT_DUPLICATES", "false").lower() == "true"
+
+# Sequences left behind when UTF-8 text was decoded as cp1252 / latin-1.
+MOJIBAKE_MARKERS = ("Ã", "Â", "â€")
+# Produced when undecodable bytes are read with errors="replace".
+REPLACEMENT_CHAR = "�"
+
+
+class ColumnBatch:
+    """Product columns of a batch of parsed rows, validated column by column.
+
+    Each rule works on whole columns and records the first failing reason per
+    row; rows superseded by a later duplicate are dropped without an error.
+    Rules see missing values as ""; `missing` remembers them for the
+    nullable columns.
+    """
+
+    def __init__(
+        self, rows: list[Sequence[str | None]], fieldnames: Sequence[str]
+    ) -> None:
+        indexes = {
+            column: fieldnames.index(column)
+            for column in PRODUCT_COLUMNS if column in fieldnames
+        }
+        # Short rows need a bounds check; full ones are picked in C.
+        complete = min(map(len, rows)) > max(indexes.values(), default=-1)
+        self.columns: dict[str, list[str]] = {}
+        self.missing: dict[str, list[int]] = {}
+        for column in PRODUCT_COLUMNS:
+            index = indexes.get(column)
+            if index is None:
+                values = [None] * len(rows)
+            elif complete:
+                values = list(map(itemgetter(index), rows))
+            else:
+                values = [row[index] if index < len(row) else None for row in rows]
+            # all() is a cheap scan; only falsy values can be None.
+            if not all(values):
+                if column in NULLABLE_COLUMNS:
+                    self.missing[column] = [
+                        i for i, value in enumerate(values) if value is None
+                    ]
+                values = [value or "" for value in values]
+            self.columns[column] = values
+        self.reasons: list[str | None] = [None] * len(rows)
+        self.dropped: set[int] = set()
+
+    def reject(self, indexes: list[int], reason: str) -> None:
+        """Record `reason` for rows that have not failed another rule yet."""
+        for index in indexes:
+            if self.reasons[index] is None:
+                self.reasons[index] = reason
+
+
+ValidationRule = Callable[[ColumnBatch], None]
+# Rules run in registration order.
+VALIDATION_RULES: dict[str, ValidationRule] = {}
+
+
+def validation_rule(name: str) -> Callable[[ValidationRule], ValidationRule]:
+    """Register a rule under `name` for IMPORT_VALIDATION_RULES."""
+    def register(rule: ValidationRule) -> ValidationRule:
+        VALIDATION_RULES[name] = rule
+        return rule
+    return register
+
+
+def repair_text(value: str) -> str:
+    """Drop NUL characters and undo UTF-8 text decoded as cp1252."""
+    value = value.replace("\x00", "")
+    if any(marker in value for marker in MOJIBAKE_MARKERS):
+        try:
+            value = value.encode("cp1252").decode("utf-8")
+        except UnicodeError:
+            pass
+    return value
+
+
+@validation_rule("repair_encoding")
+def repair_encoding(batch: ColumnBatch) -> None:
+    """Repair mojibake and NULs, reject values with undecodable bytes."""
+    for column, values in batch.columns.items():
+        # One scan over the joined column skips the common all-clean case.
+        joined = "\x1f".join(values)
+        if REPLACEMENT_CHAR in joined:
+            batch.reject(
+                [i for i, value in enumerate(values) if REPLACEMENT_CHAR in value],
+                INVALID_ENCODING_REASON.format(column=column),
+            )
+        if "\x00" in joined or any(marker in joined for marker in MOJIBAKE_MARKERS):
+            batch.columns[column] = list(map(repair_text, values))
+
+
+@validation_rule("normalize_whitespace")
+def normalize_whitespace(batch: ColumnBatch) -> None:
+    """Strip every column and collapse whitespace runs inside names."""
+    columns = batch.columns
+    for column in PRODUCT_COLUMNS:
+        columns[column] = list(map(str.strip, columns[column]))
+    joined = "\x1f".join(columns["name"])
+    if any(run in joined for run in ("  ", "\t", "\n", "\r")):
+        columns["name"] = [" ".join(value.split()) for value in columns["name"]]
+
+
+@validation_rule("require_sku")
+def require_sku(batch: ColumnBatch) -> None:
+    """Reject rows without a SKU."""
+    skus = batch.columns["sku"]
+    if not all(skus):
+        batch.reject([i for i, sku in enumerate(skus) if not sku], MISSING_SKU_REASON)
+
+
+@validation_rule("max_length")
+def max_length(batch: ColumnBatch) -> None:
+    """Reject values longer than the configured column limits."""
+    for column, limit in MAX_LENGTHS.items():
+        values = batch.columns[column]
+        if values and max(map(len, values)) > limit:
+            batch.reject(
+                [i for i, value in enumerate(values) if len(value) > limit],
+                f"{column} longer than {limit} characters",
+            )
+
+
+@validation_rule("duplicate_sku")
+def duplicate_sku(batch: ColumnBatch) -> None:
+    """Keep only the last valid row of each SKU, compared case-folded.
+
+    Folding with lower() matches the unique index on lower(sku).
+    """
+    keys = list(map(str.lower, batch.columns["sku"]))
+    if len(set(keys)) == len(keys):
+        return
+    reasons = batch.reasons
+    last_index = {key: i for i, key in enumerate(keys) if reasons[i] is None}
+    superseded = [
+        i for i, key in enumerate(keys)
+        if reasons[i] is None and last_index[key] != i
+    ]
+    if IMPORT_STRICT_DUPLICATES:
+        batch.reject(superseded, DUPLICATE_SKU_REASON)
+    else:
+        batch.dropped.update(superseded)
+
+
+IMPORT_VALIDATION_RULES = [
+    VALIDATION_RULES[name.strip()]
+    for name in os.getenv(
+        "IMPORT_VALIDATION_RULES", ",".join(VALIDATION_RULES)
+    ).split(",")
+    if name.strip()
+]
+
+
+def validate_rows(
+    rows: list[Sequence[str | None]], fieldnames: Sequence[str]
+) -> tuple[list[dict[str, str | None]], list[tuple[int, str]]]:
+    """Validate a batch of parsed rows with the given column names.
+
+    Returns the normalized product rows to load and the (index, reason) of
+    every rejected input row. Missing values of nullable columns are None.
+    """
+    if not rows:
+        return [], []
+    batch = ColumnBatch(rows, fieldnames)
+    for rule in IMPORT_VALIDATION_RULES:
+        rule(batch)
+
+    columns = batch.columns
+    for column, indexes in batch.missing.items():
+        values = columns[column]
+        for index in indexes:
+            values[index] = None
+    rows_and_reasons = zip(
+        columns["sku"], columns["name"], columns["description"], batch.reasons
+    )
+    if batch.reasons.count(None) == len(batch.reasons) and not batch.dropped:
+        valid = [
+            {"sku": sku, "name": name, "description": description}
+            for sku, name, description, _ in rows_and_reasons
+        ]
+        return valid, []
+
+    valid = [
+        {"sku": sku, "name": name, "description": description}
+        for index, (sku, name, description, reason) in enumerate(rows_and_reasons)
+        if reason is None and index not in batch.dropped
+    ]
+    rejected = [
+        (index, reason) for index, reason in enumerate(batch.reasons)
+        if reason is not None
+    ]
+    return valid, rejected
@@ -0,0 +1,212 @@
+"""Streaming helpers for CSV bytes flowing to and from S3."""
+import codecs
+import csv
+import io
+import re
+import time
+from typing import Iterator
+
+import boto3
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+from app.constants.file import S3_BUCKET
+
+PROBE_BYTES = 256 * 1024
+# A quote closing a field must be followed by a delimiter, and one opening a
+# field preceded by one; anything else is a stray quote the CSV reader takes
+# literally, so counting quotes no longer tells quoted text apart.
+# The second pattern runs on the reversed text so both start with a literal.
+STRAY_QUOTE_AFTER = re.compile(rb'"[^,\r\n"]')
+STRAY_QUOTE_BEFORE = re.compile(rb'"[^,\n"]')
+# Bytes requested per read while streaming an object line by line.
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def lines_are_records(lines: bytes) -> bool:
+    """Check that whole CSV lines hold one record each.
+
+    Splitting on quotes leaves the quoted sections at odd positions: none may
+    contain a newline, and the text between them has to end a field before
+    each quoted section and start one after it.
+    """
+    parts = lines.split(b'"')
+    if len(parts) == 1:
+        return True
+    if len(parts) % 2 == 0:
+        return False
+    # Each quoted section collapses to a single quote.
+    unquoted = b'"'.join(parts[0::2])
+    return (
+        unquoted.count(b"\n") == lines.count(b"\n")
+        and STRAY_QUOTE_AFTER.search(unquoted) is None
+        and STRAY_QUOTE_BEFORE.search(unquoted[::-1]) is None
+    )
+
+
+class LineStream:
+    """Iterate decoded lines of an S3 body while tracking bytes consumed.
+
+    Also tracks the seconds spent waiting on S3, apart from parsing.
+    """
+
+    def __init__(self, body, start_offset: int = 0) -> None:
+        self.body = body
+        self.bytes_read = start_offset
+        self.read_seconds = 0.0
+
+    def chunks(self) -> Iterator[bytes]:
+        """Raw chunks of the body, timing each read."""
+        while True:
+            started_at = time.perf_counter()
+            chunk = self.body.read(READ_CHUNK_BYTES)
+            self.read_seconds += time.perf_counter() - started_at
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self) -> Iterator[str]:
+        # Same splitting as StreamingBody.iter_lines(keepends=True).
+        pending = b""
+        for chunk in self.chunks():
+            if not self.bytes_read and not pending and chunk.startswith(codecs.BOM_UTF8):
+                # Counted as read, but not part of the first column name.
+                self.bytes_read += len(codecs.BOM_UTF8)
+                chunk = chunk[len(codecs.BOM_UTF8):]
+            lines = (pending + chunk).splitlines(True)
+            pending = lines.pop()
+            for line in lines:
+                self.bytes_read += len(line)
+                # Undecodable bytes become U+FFFD and are rejected by validation.
+                yield line.decode("utf-8", errors="replace")
+        if pending:
+            self.bytes_read += len(pending)
+            yield pending.decode("utf-8", errors="replace")
+
+
+class RowCounter:
+    """Count CSV data rows and capture the header while bytes stream past.
+
+    Also checks whether every record sits on a line of its own, which is
+    what makes the file safe to split into byte ranges at newlines.
+    """
+
+    def __init__(self) -> None:
+        self.bytes_seen = 0
+        self.newlines = 0
+        self.last_byte = b""
+        self.header_bytes = b""
+        self.lines_checked = True
+        self.partial_line = b""
+
+    def feed(self, chunk: bytes) -> None:
+        """Account for the next chunk of the file."""
+        if not chunk:
+            return
+        if b"\n" not in self.header_bytes and len(self.header_bytes) < PROBE_BYTES:
+            self.header_bytes += chunk[:PROBE_BYTES]
+        self.bytes_seen += len(chunk)
+        self.newlines += chunk.count(b"\n")
+        self.last_byte = chunk[-1:]
+        if self.lines_checked:
+            self.check_lines(chunk)
+
+    def check_lines(self, chunk: bytes) -> None:
+        """Check the whole lines completed by `chunk`, keeping the rest."""
+        data = self.partial_line + chunk
+        if self.bytes_seen == len(chunk):
+            data = data.removeprefix(codecs.BOM_UTF8)
+        end = data.rfind(b"\n") + 1
+        if not lines_are_records(data[:end]):
+            self.lines_checked = False
+        self.partial_line = data[end:]
+
+    @property
+    def single_line_rows(self) -> bool:
+        """Whether every record seen so far, the last line included, is one line."""
+        return self.lines_checked and lines_are_records(self.partial_line + b"\n")
+
+    def header(self, at_eof: bool = False) -> list[str] | None:
+        """Column names of the header line, once it has been seen whole."""
+        line, newline, _ = self.header_bytes.partition(b"\n")
+        if not newline and not at_eof:
+            return None
+        return next(csv.reader([line.decode("utf-8-sig")]), [])
+
+    @property
+    def row_count(self) -> int:
+        """Number of data rows seen so far, excluding the header line."""
+        lines = self.newlines
+        if self.last_byte and self.last_byte != b"\n":
+            lines += 1
+        return max(lines - 1, 0)
+
+
+def open_object_from(s3_client: boto3.client, key: str, offset: int):
+    """Open the body of an S3 object from `offset`; empty when past the end."""
+    try:
+        obj = s3_client.get_object(
+            Bucket=S3_BUCKET, Key=key, Range=f"bytes={offset}-"
+        )
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "InvalidRange":
+            raise
+        return StreamingBody(io.BytesIO(b""), 0)
+    return obj["Body"]
+
+
+def read_range(
+    s3_client: boto3.client, key: str, start: int, end: int
+) -> bytes:
+    """Read the bytes [start, end) of an S3 object."""
+    obj = s3_client.get_object(
+        Bucket=S3_BUCKET, Key=key, Range=f"bytes={start}-{end - 1}"
+    )
+    return obj["Body"].read()
+
+
+def read_header(s3_client: boto3.client, key: str) -> tuple[list[str], int]:
+    """Read the CSV header of an S3 object and the offset where data starts."""
+    probe = read_range(s3_client, key, 0, PROBE_BYTES)
+    header_end = probe.find(b"\n") + 1 or len(probe)
+    # utf-8-sig drops a byte order mark, as the upload header check does.
+    fieldnames = next(csv.reader([probe[:header_end].decode("utf-8-sig")]))
+    return fieldnames, header_end
+
+
+def find_line_start(s3_client: boto3.client, key: str, offset: int) -> int | None:
+    """Offset of the first line starting after `offset`.
+
+    Returns the end of the object when its last line has no newline, and
+    None when no line ends within PROBE_BYTES.
+    """
+    window = read_range(s3_client, key, offset, offset + PROBE_BYTES)
+    position = window.find(b"\n")
+    if position == -1:
+        return offset + len(window) if len(window) < PROBE_BYTES else None
+    return offset + position + 1
+
+
+def plan_byte_ranges(
+    s3_client: boto3.client, key: str, size: int, chunk_bytes: int
+) -> tuple[list[str], list[tuple[int, int]]] | None:
+    """Split an S3 CSV object into byte ranges that start on line boundaries.
+
+    Only valid for files whose rows each sit on one line, as recorded by
+    RowCounter.single_line_rows at upload; any newline is then a record
+    boundary. Returns the header and the [start, end) ranges of the data
+    rows, or None when the file should be read serially.
+    """
+    fieldnames, header_end = read_header(s3_client, key)
+    boundaries = [header_end]
+    offset = header_end + chunk_bytes
+    while offset < size:
+        start = find_line_start(s3_client, key, offset)
+        if start is None:
+            return None
+        if start >= size:
+            break
+        boundaries.append(start)
+        offset = start + chunk_bytes
+    boundaries.append(size)
+    return fieldnames, list(zip(boundaries, boundaries[1:]))
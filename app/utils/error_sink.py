@@ -0,0 +1,151 @@
+"""Streaming sink for rows rejected during an import."""
+import csv
+import io
+import os
+import tempfile
+from typing import Sequence
+
+import boto3
+
+from app.constants.file import S3_BUCKET
+
+# S3 requires every part but the last to be at least 5 MiB.
+ERROR_PART_SIZE = 8 * 1024 * 1024
+
+
+class ErrorSink:
+    """Write rejected rows to S3 as a multipart upload while a file is processed.
+
+    Rows keep their original columns plus a `reason` column. At most one part
+    is buffered in memory, however many rows are rejected.
+    """
+
+    def __init__(
+        self, s3_client: boto3.client, key: str, fieldnames: list[str],
+        part_size: int = ERROR_PART_SIZE
+    ) -> None:
+        self.s3_client = s3_client
+        self.key = key
+        self.fieldnames = fieldnames
+        self.part_size = part_size
+        self.count = 0
+        self.upload_id: str | None = None
+        self.parts: list[dict[str, str | int]] = []
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow([*fieldnames, "reason"])
+
+    def write(self, row: Sequence[str | None], reason: str) -> None:
+        """Append a rejected row, uploading a part once enough is buffered."""
+        width = len(self.fieldnames)
+        # Short rows are padded and extra fields dropped to keep `reason` aligned.
+        self.writer.writerow(
+            [*row[:width], *[None] * (width - len(row)), reason]
+        )
+        self.count += 1
+        # tell() counts characters, which never exceeds the encoded size.
+        if self.buffer.tell() >= self.part_size:
+            self._upload_part()
+
+    def _upload_part(self) -> None:
+        """Upload the buffered rows as the next part of the multipart upload."""
+        data = self.buffer.getvalue().encode("utf-8")
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                Bucket=S3_BUCKET, Key=self.key, ContentType="text/csv"
+            )["UploadId"]
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=S3_BUCKET,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def close(self) -> str | None:
+        """Finish the upload; returns the S3 key, or None if no row was rejected."""
+        if not self.count:
+            self.abort()
+            return None
+
+        if self.upload_id is None:
+            self.s3_client.put_object(
+                Bucket=S3_BUCKET,
+                Key=self.key,
+                Body=self.buffer.getvalue().encode("utf-8"),
+                ContentType="text/csv",
+            )
+        else:
+            if self.buffer.tell():
+                self._upload_part()
+            self.s3_client.complete_multipart_upload(
+                Bucket=S3_BUCKET,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+        return self.key
+
+    def abort(self) -> None:
+        """Discard an unfinished multipart upload."""
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=S3_BUCKET, Key=self.key, UploadId=self.upload_id
+            )
+            self.upload_id = None
+
+
+def error_segment_prefix(file_id: int) -> str:
+    """S3 key prefix of the error segments written for a file."""
+    return f"errors/{file_id}/segment-"
+
+
+def error_segment_key(file_id: int, start_row: int) -> str:
+    """S3 key of the error rows rejected after checkpoint row `start_row`."""
+    return f"{error_segment_prefix(file_id)}{start_row:012d}.csv"
+
+
+def list_error_segments(s3_client: boto3.client, file_id: int) -> list[str]:
+    """List the error segment keys of a file in row order."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    keys = [
+        item["Key"]
+        for page in paginator.paginate(
+            Bucket=S3_BUCKET, Prefix=error_segment_prefix(file_id)
+        )
+        for item in page.get("Contents", [])
+    ]
+    return sorted(keys)
+
+
+def merge_error_files(
+    s3_client: boto3.client, keys: list[str], key: str
+) -> None:
+    """Concatenate error files into one CSV with a single header."""
+    with tempfile.NamedTemporaryFile(
+        mode="wb",
+        suffix=".csv",
+        delete=False
+    ) as error_file:
+        for index, part_key in enumerate(keys):
+            obj = s3_client.get_object(Bucket=S3_BUCKET, Key=part_key)
+            for line_no, line in enumerate(obj["Body"].iter_lines(keepends=True)):
+                if line_no == 0 and index > 0:
+                    continue
+                error_file.write(line)
+        temp_path = error_file.name
+
+    s3_client.upload_file(Filename=temp_path, Bucket=S3_BUCKET, Key=key)
+    os.remove(temp_path)
+    # delete_objects accepts at most 1000 keys per request.
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(
+            Bucket=S3_BUCKET,
+            Delete={
+                "Objects": [{"Key": part_key} for part_key in keys[start:start + 1000]]
+            },
+        )
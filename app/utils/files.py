@@ -1,42 +1,81 @@
 """Utility functions for file processing."""
+import asyncio
+import os
+import time
+
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 
+from app.constants.file import FINISHED_STATUSES
+from app.db.async_connection import AsyncSessionLocal
 from app.db.file_process import FileProcessor
 
+# Watchers of the same file within this many seconds share one lookup.
+PROGRESS_SNAPSHOT_TTL = float(os.getenv("PROGRESS_SNAPSHOT_TTL", "2"))
+
+# file id -> (expiry, lookup task); a pending task is awaited by every caller.
+FILE_SNAPSHOTS: dict[int, tuple[float, asyncio.Task]] = {}
+
+
+async def read_file_snapshot(file_id: int) -> dict[str, str | int]:
+    """Read the stored progress fields of a file in one query.
+
+    Keys match the websocket payload; an unknown file gives an empty dict.
+    """
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(
+                FileProcessor.status,
+                FileProcessor.total_number_of_records,
+                FileProcessor.rows_with_errors,
+                FileProcessor.records_inserted,
+                FileProcessor.records_updated,
+                FileProcessor.records_unchanged,
+                FileProcessor.checkpoint_row,
+                FileProcessor.checkpoint_offset,
+            ).where(FileProcessor.id == file_id)
+        )).one_or_none()
+    if row is None:
+        return {}
+    # Rows processed, rejected ones included, as the live counter counts them;
+    # fanned-out files are not checkpointed and report their total once done.
+    if row.status in FINISHED_STATUSES:
+        progress = row.total_number_of_records
+    else:
+        progress = row.checkpoint_row
+    return {
+        "status": row.status.value,
+        "progress": progress,
+        "total": row.total_number_of_records,
+        "errors": row.rows_with_errors,
+        "bytes_processed": row.checkpoint_offset,
+        "inserted": row.records_inserted,
+        "updated": row.records_updated,
+        "unchanged": row.records_unchanged,
+    }
+
+
+async def get_file_snapshot(file_id: int) -> dict[str, str | int]:
+    """Stored progress of a file, shared for PROGRESS_SNAPSHOT_TTL seconds.
+
+    Concurrent callers await the same in-flight query, so N watchers of a
+    file cost one database round trip.
+    """
+    now = time.monotonic()
+    cached = FILE_SNAPSHOTS.get(file_id)
+    if cached is None or cached[0] <= now:
+        expired = [key for key, (expiry, _) in FILE_SNAPSHOTS.items() if expiry <= now]
+        for key in expired:
+            del FILE_SNAPSHOTS[key]
+        task = asyncio.create_task(read_file_snapshot(file_id))
+        task.add_done_callback(forget_failed_snapshot)
+        cached = FILE_SNAPSHOTS[file_id] = (now + PROGRESS_SNAPSHOT_TTL, task)
+    # One watcher going away must not cancel the lookup for the others.
+    return await asyncio.shield(cached[1])
+
 
-def get_file_status(db: Session, file_id: str) -> str | None:
-    """Get the status of a file processor record."""
-    file_processor: FileProcessor | None = db.execute(
-        select(FileProcessor).where(FileProcessor.id == file_id)
-    ).scalar_one_or_none()
-    if not file_processor:
-        return None
-    return file_processor.status
-
-def get_file_progress(db: Session, file_id: str) -> int:
-    """Get the number of records inserted for a file."""
-    file_processor: FileProcessor | None = db.execute(
-        select(FileProcessor).where(FileProcessor.id == file_id)
-    ).scalar_one_or_none()
-    if not file_processor:
-        return 0
-    return file_processor.records_inserted
-
-def get_total_records(db: Session, file_id: str) -> int:
-    """Get the total number of records for a file."""
-    file_processor: FileProcessor | None = db.execute(
-        select(FileProcessor).where(FileProcessor.id == file_id)
-    ).scalar_one_or_none()
-    if not file_processor:
-        return 0
-    return file_processor.total_number_of_records
-
-def get_error_count(db: Session, file_id: str) -> int:
-    """Get the error count for a file."""
-    file_processor: FileProcessor | None = db.execute(
-        select(FileProcessor).where(FileProcessor.id == file_id)
-    ).scalar_one_or_none()
-    if not file_processor:
-        return 0
-    return file_processor.file_with_errors.count(',') + 1 if file_processor.file_with_errors else 0
+def forget_failed_snapshot(task: asyncio.Task) -> None:
+    """Drop a failed lookup so the next caller queries again."""
+    if task.cancelled() or task.exception() is not None:
+        for key, (_, cached_task) in list(FILE_SNAPSHOTS.items()):
+            if cached_task is task:
+                del FILE_SNAPSHOTS[key]
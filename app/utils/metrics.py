@@ -0,0 +1,95 @@
+"""Prometheus metrics of the import pipeline.
+
+With several processes per host (Celery prefork, uvicorn workers) set
+PROMETHEUS_MULTIPROC_DIR to a shared empty directory so every process's
+samples are aggregated when scraped.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+IMPORT_STAGE_SECONDS = Histogram(
+    "import_stage_seconds",
+    "Seconds spent per batch in each import stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+IMPORT_ROWS = Counter(
+    "import_rows", "Rows read from import files", ["outcome"]
+)
+IMPORT_BYTES = Counter("import_bytes", "Bytes of import files read from S3")
+IMPORT_BATCH_ROWS = Histogram(
+    "import_batch_rows",
+    "Rows per batch read from an import file",
+    buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000, 200000),
+)
+IMPORT_FILE_ROWS_PER_SECOND = Histogram(
+    "import_file_rows_per_second",
+    "Rows per second of finished import runs",
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000),
+)
+IMPORT_FILE_BYTES_PER_SECOND = Histogram(
+    "import_file_bytes_per_second",
+    "S3 bytes per second of finished import runs",
+    buckets=tuple(2 ** power for power in range(16, 31, 2)),
+)
+IMPORT_QUEUE_DEPTH = Gauge(
+    "import_queue_depth",
+    "Tasks waiting in the Celery queue",
+    multiprocess_mode="mostrecent",
+)
+
+# Per-stage seconds of the import running in this context, if any.
+CURRENT_TIMINGS: ContextVar[dict[str, float] | None] = ContextVar(
+    "import_timings", default=None
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Observe a stage duration and add it to the current import's timings."""
+    IMPORT_STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = CURRENT_TIMINGS.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one `stage` observation."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started_at)
+
+
+@contextmanager
+def collect_timings(timings: dict[str, float]) -> Iterator[dict[str, float]]:
+    """Accumulate the stages timed in the enclosed block into `timings`."""
+    token = CURRENT_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        CURRENT_TIMINGS.reset(token)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to expose: all processes' samples in multiprocess mode."""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
@@ -0,0 +1,209 @@
+"""Read-through cache for products looked up by SKU."""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+from app.redis import (
+    PUBSUB_RECONNECT_DELAY,
+    PUBSUB_RECONNECT_MAX_DELAY,
+    REDIS_HOST,
+    REDIS_PORT,
+    async_redis_client,
+    redis_client,
+)
+
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", "300"))
+PRODUCT_CACHE_LOCAL_TTL = float(os.getenv("PRODUCT_CACHE_LOCAL_TTL", "30"))
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+INVALIDATION_CHANNEL = "product_cache:invalidate"
+INVALIDATION_BATCH_SIZE = 1000
+# Invalidated keys hold a tombstone for a while instead of being deleted, so
+# a reader that loaded the row before the write committed cannot fill the
+# cache with it afterwards.
+TOMBSTONE = b""
+TOMBSTONE_TTL = 10
+
+
+def cache_key(sku: str) -> str:
+    """Redis key of a product, by normalized lowercase SKU."""
+    return f"product:{sku.strip().lower()}"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        """Return a fresh entry and mark it as recently used."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        """Store an entry, evicting the least recently used past max_size."""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        """Drop entries if present."""
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class ProductCache:
+    """In-process LRU in front of Redis, invalidated on every product write.
+
+    Writers tombstone the Redis keys and publish the SKUs on
+    INVALIDATION_CHANNEL after their transaction commits; every API process
+    evicts them from its LRU when the message arrives.
+    """
+
+    def __init__(self) -> None:
+        self.local = LRUCache(PRODUCT_CACHE_SIZE, PRODUCT_CACHE_LOCAL_TTL)
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, sku: str) -> dict | None:
+        """Cached product for a SKU, or None on a miss."""
+        key = cache_key(sku)
+        product = self.local.get(key)
+        if product is not None:
+            self.hits_local += 1
+            return product
+
+        return self._from_redis(key, redis_client.get(key))
+
+    async def get_async(self, sku: str) -> dict | None:
+        """Like get(), without blocking the event loop on Redis."""
+        key = cache_key(sku)
+        product = self.local.get(key)
+        if product is not None:
+            self.hits_local += 1
+            return product
+
+        return self._from_redis(key, await async_redis_client.get(key))
+
+    def _from_redis(self, key: str, raw: bytes | None) -> dict | None:
+        """Decode a Redis value into the local LRU; tombstones are misses."""
+        if not raw:
+            self.misses += 1
+            return None
+        self.hits_redis += 1
+        product = json.loads(raw)
+        self.local.set(key, product)
+        return product
+
+    def set(self, sku: str, product: dict) -> None:
+        """Cache a product read from the database, unless it was invalidated."""
+        key = cache_key(sku)
+        if redis_client.set(key, json.dumps(product), ex=PRODUCT_CACHE_TTL, nx=True):
+            self.local.set(key, product)
+
+    async def set_async(self, sku: str, product: dict) -> None:
+        """Like set(), without blocking the event loop on Redis."""
+        key = cache_key(sku)
+        if await async_redis_client.set(
+            key, json.dumps(product), ex=PRODUCT_CACHE_TTL, nx=True
+        ):
+            self.local.set(key, product)
+
+    def invalidate(self, skus: Iterable[str]) -> None:
+        """Drop SKUs everywhere; call after the write has been committed."""
+        batch: list[str] = []
+        for sku in skus:
+            batch.append(cache_key(sku))
+            if len(batch) >= INVALIDATION_BATCH_SIZE:
+                self._invalidate_keys(batch)
+                batch = []
+        if batch:
+            self._invalidate_keys(batch)
+
+    def _invalidate_keys(self, keys: list[str]) -> None:
+        """Tombstone keys in Redis and broadcast them to every local cache."""
+        pipeline = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(key, TOMBSTONE, ex=TOMBSTONE_TTL)
+        pipeline.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+        pipeline.execute()
+        self.local.delete(keys)
+        self.invalidations += len(keys)
+
+    def stats(self) -> dict[str, int | float]:
+        """Hit/miss counters of this process."""
+        lookups = self.hits_local + self.hits_redis + self.misses
+        return {
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "hit_ratio": (
+                (self.hits_local + self.hits_redis) / lookups if lookups else 0.0
+            ),
+            "invalidations": self.invalidations,
+            "local_size": len(self.local),
+        }
+
+    async def listen_for_invalidations(self) -> None:
+        """Evict SKUs invalidated by other processes from the local LRU.
+
+        Invalidations published while the subscription is down are missed,
+        so the local LRU is cleared each time it is re-established.
+        """
+        client = AsyncRedis(host=REDIS_HOST, port=REDIS_PORT, health_check_interval=30)
+        delay = PUBSUB_RECONNECT_DELAY
+        try:
+            while True:
+                pubsub = client.pubsub()
+                try:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    self.local.clear()
+                    delay = PUBSUB_RECONNECT_DELAY
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.local.delete(json.loads(message["data"]))
+                except RedisError as exc:
+                    print(
+                        f"Cache invalidation subscription lost, "
+                        f"reconnecting in {delay:g}s: {exc}"
+                    )
+                finally:
+                    await pubsub.aclose()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, PUBSUB_RECONNECT_MAX_DELAY)
+        finally:
+            await client.aclose()
+
+
+product_cache = ProductCache()
@@ -0,0 +1,155 @@
+"""Streaming multipart uploads to S3 that keep blocking calls off the event loop."""
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+import boto3
+from starlette.concurrency import run_in_threadpool
+
+from app.constants.file import S3_BUCKET, InputFormat
+from app.utils.csv_stream import RowCounter
+from app.utils.input_readers import input_format_from_name, sniff_input_format
+
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(16 * 1024 * 1024)))
+UPLOAD_MAX_CONCURRENT_PARTS = int(os.getenv("UPLOAD_MAX_CONCURRENT_PARTS", "4"))
+UPLOAD_READ_SIZE = 1024 * 1024
+REQUIRED_COLUMNS = ("sku",)
+
+
+class InvalidCsvError(ValueError):
+    """Raised when an uploaded stream is not a usable product CSV."""
+
+
+@dataclass
+class UploadResult:
+    """Outcome of a streamed upload."""
+    key: str
+    size: int
+    row_count: int
+    # Every row is on one line, so the file may be split at newlines.
+    single_line_rows: bool
+
+
+class S3MultipartUpload:
+    """Upload fixed-size parts to S3 with at most N parts in flight.
+
+    Every boto3 call runs in the thread pool. Waiting for a free upload slot
+    before accepting the next part bounds memory to roughly
+    `max_concurrency * part_size` per upload.
+    """
+
+    def __init__(
+        self, s3_client: boto3.client, key: str,
+        max_concurrency: int = UPLOAD_MAX_CONCURRENT_PARTS
+    ) -> None:
+        self.s3_client = s3_client
+        self.key = key
+        self.upload_id: str | None = None
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Create the multipart upload."""
+        response = await run_in_threadpool(
+            self.s3_client.create_multipart_upload,
+            Bucket=S3_BUCKET, Key=self.key, ContentType="text/csv"
+        )
+        self.upload_id = response["UploadId"]
+
+    async def _upload_part(self, part_number: int, data: bytes) -> dict[str, str | int]:
+        """Upload one part and free its slot."""
+        try:
+            response = await run_in_threadpool(
+                self.s3_client.upload_part,
+                Bucket=S3_BUCKET, Key=self.key, UploadId=self.upload_id,
+                PartNumber=part_number, Body=data
+            )
+            return {"ETag": response["ETag"], "PartNumber": part_number}
+        finally:
+            self.slots.release()
+
+    async def add_part(self, data: bytes) -> None:
+        """Schedule the next part, waiting while too many are in flight."""
+        await self.slots.acquire()
+        part_number = len(self.tasks) + 1
+        self.tasks.append(asyncio.create_task(self._upload_part(part_number, data)))
+
+    async def complete(self) -> None:
+        """Wait for all parts and complete the upload."""
+        parts = await asyncio.gather(*self.tasks)
+        await run_in_threadpool(
+            self.s3_client.complete_multipart_upload,
+            Bucket=S3_BUCKET, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": list(parts)}
+        )
+
+    async def abort(self) -> None:
+        """Cancel outstanding parts and abort the upload."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.upload_id is not None:
+            await run_in_threadpool(
+                self.s3_client.abort_multipart_upload,
+                Bucket=S3_BUCKET, Key=self.key, UploadId=self.upload_id
+            )
+
+
+async def stream_csv_to_s3(
+    chunks: AsyncIterator[bytes], s3_client: boto3.client, key: str,
+    part_size: int = UPLOAD_PART_SIZE
+) -> UploadResult:
+    """Stream a CSV to S3 in multipart parts, validating the header and
+    counting rows on the way through.
+
+    Compressed CSV and Parquet are stored as they are; their header is
+    checked and their rows counted by the worker.
+    """
+    counter = RowCounter()
+    upload = S3MultipartUpload(s3_client, key)
+    buffer = bytearray()
+    input_format = input_format_from_name(key)
+    header_checked = False
+
+    await upload.start()
+    try:
+        async for chunk in chunks:
+            if input_format is None and chunk:
+                input_format = sniff_input_format(chunk)
+            if input_format not in (None, InputFormat.CSV):
+                # Nothing to check or count in the raw bytes.
+                header_checked = True
+            counter.feed(chunk)
+            buffer += chunk
+            if not header_checked and counter.header() is not None:
+                check_header(counter.header())
+                header_checked = True
+            while len(buffer) >= part_size:
+                await upload.add_part(bytes(buffer[:part_size]))
+                del buffer[:part_size]
+
+        if not header_checked:
+            check_header(counter.header(at_eof=True))
+        # S3 needs at least one part, even for an empty trailing buffer.
+        if buffer or not upload.tasks:
+            await upload.add_part(bytes(buffer))
+        await upload.complete()
+    except BaseException:
+        await upload.abort()
+        raise
+
+    return UploadResult(
+        key=key,
+        size=counter.bytes_seen,
+        row_count=counter.row_count if input_format == InputFormat.CSV else 0,
+        single_line_rows=input_format == InputFormat.CSV and counter.single_line_rows,
+    )
+
+
+def check_header(header: list[str] | None) -> None:
+    """Ensure the CSV header has the columns the importer needs."""
+    columns = set(header or [])
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise InvalidCsvError(f"CSV header is missing columns: {', '.join(missing)}")
@@ -1,65 +1,87 @@
 """WebSocket endpoints for file processing progress."""
 import asyncio
 
-from fastapi import APIRouter, Depends, WebSocket
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from app.db.connection import get_db
-from app.redis import get_with_fallback
-from app.utils.files import (
-    get_error_count,
-    get_file_progress,
-    get_file_status,
-    get_total_records,
-)
+from app.redis import get_progress, set_progress
+from app.utils.files import get_file_snapshot
+from app.websockets.progress_hub import progress_hub
 
 router = APIRouter()
 
+# Without events for this long the snapshot is re-read and re-sent, which
+# also notices clients that went away.
+KEEPALIVE_SECONDS = 30
+TERMINAL_STATUSES = ("completed", "completed_with_errors", "failed")
+# Progress fields read back from the file record when Redis lost them.
+HEALED_FIELDS = ("status", "progress", "total", "errors", "bytes_processed")
+
+
+def progress_message(event: dict[str, str | int]) -> dict[str, str | int]:
+    """Build the websocket payload from a progress event or snapshot."""
+    status = event.get("status", "processing")
+    if status == "failed":
+        return {"status": "error", "message": "File processing failed"}
+
+    bytes_total = int(event.get("bytes_total", 0))
+    bytes_processed = int(event.get("bytes_processed", 0))
+    completed = status in ("completed", "completed_with_errors")
+    if completed:
+        percent = 100
+    elif bytes_total:
+        percent = min(bytes_processed * 100 // bytes_total, 100)
+    else:
+        percent = 0
+    return {
+        "status": "completed" if completed else "processing",
+        "progress": int(event.get("progress", 0)),
+        "total": int(event.get("total", 0)),
+        "errors": int(event.get("errors", 0)),
+        "inserted": int(event.get("inserted", 0)),
+        "updated": int(event.get("updated", 0)),
+        "unchanged": int(event.get("unchanged", 0)),
+        "bytes_processed": bytes_processed,
+        "bytes_total": bytes_total,
+        "percent": percent,
+    }
 
-@router.websocket("/ws/progress/{file_id}")
-async def websocket_endpoint(
-    websocket: WebSocket, file_id: str, db: Session = Depends(get_db)
-):
-    """WebSocket endpoint for file processing progress updates."""
-    await websocket.accept()
-    status = get_with_fallback(
-        "file_status", file_id, "str", lambda k: get_file_status(db, k)
-    )
-    file_id = str(file_id)
-    while status != 'completed':
-        await websocket.send_json({
-            "status": "processing",
-            "progress": get_with_fallback(
-                "file_processing", file_id, "int",
-                lambda k: get_file_progress(db, k)
-            ),
-            "total": get_with_fallback(
-                "file_total", file_id, "int",
-                lambda k: get_total_records(db, k)
-            ),
-            "errors": get_with_fallback(
-                "row_with_errors", file_id, "int",
-                lambda k: get_error_count(db, k)
-            )
-        })
-        await asyncio.sleep(1)
-        status = get_with_fallback(
-            "file_status", file_id, "str", lambda k: get_file_status(db, k)
-        )
 
-    await websocket.send_json({
-        "status": "completed",
-        "progress": get_with_fallback(
-            "file_processing", file_id, "int",
-            lambda k: get_file_progress(db, k)
-        ),
-        "total": get_with_fallback(
-            "file_total", file_id, "int",
-            lambda k: get_total_records(db, k)
-        ),
-        "errors": get_with_fallback(
-            "row_with_errors", file_id, "int",
-            lambda k: get_error_count(db, k)
-        )
-    })
+async def get_progress_snapshot(file_id: int) -> dict[str, str | int]:
+    """Read the current progress of a file from Redis, healing it from the DB.
 
+    Fields missing from Redis come from one shared database lookup and are
+    written back in one pipeline, so idle watchers hold no connection.
+    """
+    snapshot = await get_progress(file_id)
+    if any(field not in snapshot for field in HEALED_FIELDS):
+        stored = await get_file_snapshot(file_id)
+        healed = {
+            field: value for field, value in stored.items() if field not in snapshot
+        }
+        if healed:
+            await set_progress(file_id, healed)
+            snapshot.update(healed)
+    return snapshot
+
+
+@router.websocket("/ws/progress/{file_id}")
+async def websocket_endpoint(websocket: WebSocket, file_id: int):
+    """WebSocket endpoint for file processing progress updates.
+
+    Updates are pushed from the progress events the workers publish per
+    batch instead of polling Redis for every connected client.
+    """
+    await websocket.accept()
+    # Watch before reading the snapshot so no event is missed in between.
+    async with progress_hub.watch(str(file_id)) as events:
+        event = await get_progress_snapshot(file_id)
+        try:
+            await websocket.send_json(progress_message(event))
+            while event.get("status") not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(events.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    event = await get_progress_snapshot(file_id)
+                await websocket.send_json(progress_message(event))
+        except WebSocketDisconnect:
+            return
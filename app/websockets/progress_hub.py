@@ -0,0 +1,96 @@
+"""Fan-out of Redis progress events to websocket watchers."""
+import asyncio
+import contextlib
+import json
+from collections import defaultdict
+from typing import AsyncIterator
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.redis import (
+    PROGRESS_CHANNEL_PREFIX,
+    PUBSUB_RECONNECT_DELAY,
+    PUBSUB_RECONNECT_MAX_DELAY,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+
+
+class ProgressHub:
+    """One Redis subscription per API process, shared by every websocket.
+
+    Each watcher gets a queue holding only the latest event, so a slow
+    client skips intermediate updates instead of buffering them.
+    """
+
+    def __init__(self) -> None:
+        self.watchers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self.client: Redis | None = None
+        self.listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Subscribe to all file progress channels."""
+        # A dedicated client without socket_timeout, since the subscription
+        # legitimately stays idle between imports.
+        self.client = Redis(host=REDIS_HOST, port=REDIS_PORT, health_check_interval=30)
+        self.listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop listening and close the Redis connection."""
+        if self.listener is not None:
+            self.listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.listener
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def _listen(self) -> None:
+        """Keep the subscription alive, resubscribing with backoff when it drops.
+
+        Events published while disconnected are lost; watchers catch up on
+        the next event of their file.
+        """
+        delay = PUBSUB_RECONNECT_DELAY
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{PROGRESS_CHANNEL_PREFIX}*")
+                delay = PUBSUB_RECONNECT_DELAY
+                async for message in pubsub.listen():
+                    self._forward(message)
+            except RedisError as exc:
+                print(f"Progress subscription lost, reconnecting in {delay:g}s: {exc}")
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PUBSUB_RECONNECT_MAX_DELAY)
+
+    def _forward(self, message: dict) -> None:
+        """Hand a published event to the watchers of its file."""
+        if message["type"] != "pmessage":
+            return
+        file_id = message["channel"].decode("utf-8")[len(PROGRESS_CHANNEL_PREFIX):]
+        queues = self.watchers.get(file_id)
+        if not queues:
+            return
+        event = json.loads(message["data"])
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @contextlib.asynccontextmanager
+    async def watch(self, file_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive the progress events of a file while the context is open."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.watchers[file_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self.watchers[file_id].discard(queue)
+            if not self.watchers[file_id]:
+                del self.watchers[file_id]
+
+
+progress_hub = ProgressHub()
@@ -0,0 +1 @@
+"""Ingestion and API benchmarks; see the README for how to run them."""
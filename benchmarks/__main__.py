@@ -0,0 +1,93 @@
+"""Run the ingestion and API benchmarks and write a JSON report.
+
+    python -m benchmarks --rows 1000000 --formats csv,csv.gz,parquet \\
+        --api-url http://localhost:8000 --out report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from sqlalchemy import select
+
+from app.constants.file import FileStatus, InputFormat, LoadMode
+from app.db.file_process import FileProcessor
+from app.db.models import SessionLocal
+from benchmarks.api_load import run_api_load
+from benchmarks.generate import generate_records, write_catalogue
+from benchmarks.ingest import SKU_PREFIX, remove_benchmark_products, run_ingest
+from benchmarks.report import build_report
+
+WEBSOCKET_FILE_NAME = "benchmark-websocket.csv"
+
+
+def websocket_file_id() -> int:
+    """Id of a finished file record for progress websocket clients to watch."""
+    with SessionLocal() as db:
+        file_processor = db.execute(
+            select(FileProcessor).where(FileProcessor.file_name == WEBSOCKET_FILE_NAME)
+        ).scalar_one_or_none()
+        if file_processor is None:
+            file_processor = FileProcessor(
+                file_name=WEBSOCKET_FILE_NAME, status=FileStatus.COMPLETED
+            )
+            db.add(file_processor)
+            db.commit()
+        return file_processor.id
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.01)
+    parser.add_argument("--error-ratio", type=float, default=0.01)
+    parser.add_argument("--unicode-ratio", type=float, default=0.1)
+    parser.add_argument("--formats", default=InputFormat.CSV.value)
+    parser.add_argument("--load-modes", default=LoadMode.INSERT.value)
+    parser.add_argument("--s3", choices=("moto", "endpoint"), default="moto")
+    parser.add_argument("--api-url", help="also load-test this running API")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--cursor-pages", type=int, default=200)
+    parser.add_argument("--out", default="benchmark-report.json")
+    args = parser.parse_args()
+
+    ingest = []
+    with tempfile.TemporaryDirectory() as directory:
+        for input_format in map(InputFormat, args.formats.split(",")):
+            path = os.path.join(directory, f"catalogue.{input_format.value}")
+            write_catalogue(path, input_format, generate_records(
+                args.rows, args.seed, args.duplicate_ratio, args.error_ratio,
+                args.unicode_ratio, SKU_PREFIX,
+            ))
+            for load_mode in args.load_modes.split(","):
+                remove_benchmark_products()
+                # The second pass re-imports the same rows: nothing changes.
+                for run in ("insert", "unchanged"):
+                    scenario = f"{input_format.value}/{load_mode}/{run}"
+                    print(f"Importing {scenario}")
+                    result = run_ingest(
+                        path, f"benchmark-{run}.{input_format.value}", load_mode, args.s3
+                    )
+                    ingest.append({"scenario": scenario, **result})
+
+    api = {}
+    if args.api_url:
+        api = asyncio.run(run_api_load(
+            args.api_url, args.rows, args.requests, args.concurrency,
+            args.cursor_pages, websocket_file_id(), args.seed,
+        ))
+
+    settings = {
+        key: value for key, value in vars(args).items() if key not in ("out", "api_url")
+    }
+    with open(args.out, "w", encoding="utf-8") as output:
+        json.dump(build_report(settings, ingest, api), output, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Latency and throughput of the read API and the progress websocket.
+
+Runs against an API that is already serving the database the ingest
+benchmark filled, e.g. `uvicorn app.main:app`.
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable
+
+import httpx
+import websockets
+
+from benchmarks.generate import WORDS
+from benchmarks.ingest import SKU_PREFIX
+from benchmarks.report import latency_summary
+
+PAGE_SIZE = 50
+
+
+async def run_requests(
+    request: Callable[[int], Awaitable[None]], requests: int, concurrency: int
+) -> dict:
+    """Issue `requests` calls of `request(n)`, `concurrency` at a time."""
+    latencies: list[float] = []
+    errors = 0
+    next_request = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for number in next_request:
+            started_at = time.perf_counter()
+            try:
+                await request(number)
+            except (httpx.HTTPError, OSError, websockets.WebSocketException):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, errors, time.perf_counter() - started_at)
+
+
+async def deep_cursor(client: httpx.AsyncClient, pages: int) -> dict:
+    """Follow the keyset cursor `pages` deep, timing every page."""
+    latencies: list[float] = []
+    cursor = None
+    started_at = time.perf_counter()
+    for _ in range(pages):
+        params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        page_started_at = time.perf_counter()
+        response = await client.get("/products", params=params)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - page_started_at)
+        body = response.json()
+        if not body["has_more"]:
+            break
+        cursor = body["next_cursor"]
+    summary = latency_summary(latencies, 0, time.perf_counter() - started_at)
+    summary["depth_rows"] = len(latencies) * PAGE_SIZE
+    return summary
+
+
+async def run_api_load(
+    base_url: str, rows: int, requests: int, concurrency: int,
+    cursor_pages: int, websocket_file_id: int | None, seed: int = 1,
+) -> dict:
+    """Run every API scenario and return their summaries by name."""
+    rng = random.Random(seed)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+
+        async def by_sku(_: int) -> None:
+            sku = f"{SKU_PREFIX}{rng.randrange(rows):09d}"
+            response = await client.get("/products", params={"sku": sku})
+            # SKUs of generated error rows were never imported.
+            if response.status_code != 404:
+                response.raise_for_status()
+
+        async def by_search(_: int) -> None:
+            params = {"q": rng.choice(WORDS), "limit": PAGE_SIZE}
+            (await client.get("/products", params=params)).raise_for_status()
+
+        results["products_by_sku"] = await run_requests(by_sku, requests, concurrency)
+        results["products_by_q"] = await run_requests(by_search, requests, concurrency)
+        results["products_deep_cursor"] = await deep_cursor(client, cursor_pages)
+
+    if websocket_file_id is not None:
+        ws_url = base_url.replace("http", "ws", 1) + f"/ws/progress/{websocket_file_id}"
+
+        async def first_progress(_: int) -> None:
+            async with websockets.connect(ws_url) as websocket:
+                await websocket.recv()
+
+        # Every connection of a wave is open at once, as with many watchers.
+        results["progress_websocket"] = await run_requests(
+            first_progress, requests, concurrency
+        )
+    return results
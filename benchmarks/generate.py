@@ -0,0 +1,137 @@
+"""Deterministic synthetic product catalogues for import benchmarks.
+
+The same arguments always produce byte-identical files, so results can be
+compared across commits:
+
+    python -m benchmarks.generate --rows 1000000 --format csv.gz out.csv.gz
+"""
+import argparse
+import csv
+import gzip
+import io
+import random
+from itertools import islice
+from typing import Iterator
+
+from app.constants.file import InputFormat
+from app.tasks.validation import MAX_LENGTHS
+
+# Written as a lone 0xff byte by the CSV writers (surrogateescape).
+INVALID_UTF8 = "\udcff"
+ERROR_KINDS = ("missing_sku", "long_name", "invalid_utf8")
+WORDS = (
+    "steel", "cotton", "lamp", "chair", "bottle", "cable", "wallet", "kettle",
+    "pillow", "drill", "jacket", "mirror", "basket", "candle", "helmet", "tray",
+)
+UNICODE_WORDS = (
+    "café", "naïve", "Größe", "żółty", "東京", "한국어", "Ελλάδα", "🚲",
+    "crème brûlée", "señal", "Ångström", "добро",
+)
+PARQUET_ROW_GROUP_ROWS = 100000
+
+
+def generate_records(
+    rows: int,
+    seed: int = 1,
+    duplicate_ratio: float = 0.0,
+    error_ratio: float = 0.0,
+    unicode_ratio: float = 0.0,
+    sku_prefix: str = "SKU-",
+) -> Iterator[tuple[str, str, str]]:
+    """Yield (sku, name, description) rows.
+
+    Duplicates repeat the SKU of an earlier row with new content; error rows
+    cycle through ERROR_KINDS.
+    """
+    rng = random.Random(seed)
+    long_name = "x" * (MAX_LENGTHS["name"] + 1)
+    for index in range(rows):
+        words = UNICODE_WORDS if rng.random() < unicode_ratio else WORDS
+        name = " ".join(rng.choice(words) for _ in range(3))
+        description = f"{name} {rng.choice(WORDS)} {rng.randrange(10 ** 6)}"
+        if index and rng.random() < duplicate_ratio:
+            sku = f"{sku_prefix}{rng.randrange(index):09d}"
+        else:
+            sku = f"{sku_prefix}{index:09d}"
+
+        if rng.random() < error_ratio:
+            kind = ERROR_KINDS[index % len(ERROR_KINDS)]
+            if kind == "missing_sku":
+                sku = ""
+            elif kind == "long_name":
+                name = long_name
+            else:
+                description = f"{description}{INVALID_UTF8}"
+        yield sku, name, description
+
+
+def open_text(path: str, input_format: InputFormat):
+    """Open a CSV output file, compressed by format, keeping invalid bytes."""
+    if input_format == InputFormat.CSV_GZIP:
+        # mtime=0 keeps the gzip header, and so the file, reproducible.
+        raw = gzip.GzipFile(path, "wb", mtime=0)
+    elif input_format == InputFormat.CSV_ZSTD:
+        import zstandard  # pylint: disable=import-outside-toplevel
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    else:
+        raw = open(path, "wb")
+    return io.TextIOWrapper(
+        raw, encoding="utf-8", errors="surrogateescape", newline=""
+    )
+
+
+def write_parquet(path: str, records: Iterator[tuple[str, str, str]]) -> None:
+    """Write records as Parquet row groups; invalid UTF-8 cannot be stored."""
+    # pylint: disable=import-outside-toplevel
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    records = iter(records)
+    schema = pa.schema([(column, pa.string()) for column in ("sku", "name", "description")])
+    with pq.ParquetWriter(path, schema) as writer:
+        while group := list(islice(records, PARQUET_ROW_GROUP_ROWS)):
+            columns = zip(*(
+                (sku, name, description.replace(INVALID_UTF8, ""))
+                for sku, name, description in group
+            ))
+            writer.write_table(pa.table([list(column) for column in columns], schema=schema))
+
+
+def write_catalogue(
+    path: str, input_format: InputFormat, records: Iterator[tuple[str, str, str]]
+) -> None:
+    """Write records to `path` in the given input format."""
+    if input_format == InputFormat.PARQUET:
+        write_parquet(path, records)
+        return
+    with open_text(path, input_format) as output:
+        writer = csv.writer(output)
+        writer.writerow(("sku", "name", "description"))
+        writer.writerows(records)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--format", default=InputFormat.CSV.value,
+        choices=[input_format.value for input_format in InputFormat],
+    )
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--unicode-ratio", type=float, default=0.0)
+    parser.add_argument("--sku-prefix", default="SKU-")
+    args = parser.parse_args()
+
+    write_catalogue(args.path, InputFormat(args.format), generate_records(
+        args.rows, args.seed, args.duplicate_ratio, args.error_ratio,
+        args.unicode_ratio, args.sku_prefix,
+    ))
+    print(f"Wrote {args.rows} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Import throughput benchmark running process_csv_task on generated files.
+
+Uses the Postgres and Redis configured for the app (DB_*, REDIS_*), so point
+them at disposable instances. S3 is moto's in-process mock by default; with
+`s3="endpoint"` objects go to the bucket behind AWS_ENDPOINT_URL, e.g. MinIO.
+"""
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from prometheus_client import REGISTRY
+from sqlalchemy import delete
+
+from app.constants.file import S3_BUCKET, FileStatus, LoadMode
+from app.db.file_process import FileProcessor
+from app.db.models import SessionLocal
+from app.db.products import Product
+from app.tasks.csv_task import process_csv_task
+from app.utils.aws import create_session
+from app.utils.error_sink import list_error_segments
+from app.utils.input_readers import detect_input_format
+
+# Every generated SKU starts with this, so benchmark rows can be removed.
+SKU_PREFIX = "BENCH-"
+
+
+def open_s3(s3: str):
+    """S3 client for the benchmark bucket, creating the bucket if needed."""
+    if s3 == "moto":
+        # pylint: disable=import-outside-toplevel
+        import boto3
+        from moto import mock_aws
+
+        mock_aws().start()
+        s3_client = boto3.client("s3", region_name="us-east-1")
+    else:
+        s3_client = create_session().client("s3")
+    if S3_BUCKET not in {bucket["Name"] for bucket in s3_client.list_buckets()["Buckets"]}:
+        s3_client.create_bucket(Bucket=S3_BUCKET)
+    return s3_client
+
+
+def remove_benchmark_products() -> None:
+    """Delete the products earlier benchmark runs created."""
+    with SessionLocal() as db:
+        db.execute(delete(Product).where(Product.sku.like(f"{SKU_PREFIX}%")))
+        db.commit()
+
+
+def ingest_file(path: str, file_name: str, load_mode: str, s3: str) -> dict:
+    """Upload `path` and import it, returning throughput, counts and timings.
+
+    Runs in a fresh process, so the peak RSS is this import's alone.
+    """
+    s3_client = open_s3(s3)
+    s3_client.upload_file(path, S3_BUCKET, file_name)
+    db = SessionLocal()
+    # Left behind by an interrupted run.
+    db.execute(delete(FileProcessor).where(FileProcessor.file_name == file_name))
+    file_processor = FileProcessor(
+        file_name=file_name, status=FileStatus.PROCESSING, total_number_of_records=0
+    )
+    db.add(file_processor)
+    db.commit()
+
+    started_at = time.perf_counter()
+    process_csv_task(
+        file_name, file_processor, db, s3_client, LoadMode(load_mode),
+        detect_input_format(s3_client, file_name),
+    )
+    seconds = time.perf_counter() - started_at
+
+    rows = file_processor.total_number_of_records
+    s3_bytes = REGISTRY.get_sample_value("import_bytes_total") or 0
+    result = {
+        "rows": rows,
+        "inserted": file_processor.records_inserted,
+        "updated": file_processor.records_updated,
+        "unchanged": file_processor.records_unchanged,
+        "errors": file_processor.rows_with_errors,
+        "file_bytes": os.path.getsize(path),
+        "s3_bytes": int(s3_bytes),
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1),
+        "bytes_per_second": round(s3_bytes / seconds, 1),
+        # Kilobytes on Linux.
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": file_processor.timings.get("stages", {}),
+    }
+
+    keys = [file_name, *list_error_segments(s3_client, file_processor.id)]
+    if file_processor.file_with_errors:
+        keys.append(file_processor.file_with_errors)
+    for key in keys:
+        s3_client.delete_object(Bucket=S3_BUCKET, Key=key)
+    db.delete(file_processor)
+    db.commit()
+    db.close()
+    return result
+
+
+def run_ingest(path: str, file_name: str, load_mode: str, s3: str) -> dict:
+    """Run ingest_file in a freshly spawned process."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(ingest_file, path, file_name, load_mode, s3).result()
@@ -0,0 +1,108 @@
+"""Benchmark JSON reports, and comparing two of them.
+
+    python -m benchmarks.report compare before.json after.json
+"""
+import argparse
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+# Metrics where a larger value is an improvement; the rest are costs.
+HIGHER_IS_BETTER = ("rows_per_second", "bytes_per_second", "requests_per_second")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of `values`, 0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def latency_summary(latencies: list[float], errors: int, seconds: float) -> dict:
+    """Request count, error count, throughput and p50/p99 latency in ms."""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def git_commit() -> str:
+    """Commit the benchmarked tree is at, marked when it has local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def build_report(settings: dict, ingest: list[dict], api: dict) -> dict:
+    """Assemble the report with enough context to compare runs."""
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": settings,
+        },
+        "ingest": ingest,
+        "api": api,
+    }
+
+
+def flatten(report: dict) -> dict[str, float]:
+    """Numeric metrics of a report keyed by scenario and metric name."""
+    metrics = {}
+    for result in report.get("ingest", []):
+        for name, value in result.items():
+            if isinstance(value, (int, float)):
+                metrics[f"ingest {result['scenario']} {name}"] = value
+    for scenario, result in report.get("api", {}).items():
+        for name, value in result.items():
+            if isinstance(value, (int, float)):
+                metrics[f"api {scenario} {name}"] = value
+    return metrics
+
+
+def compare(before: dict, after: dict) -> None:
+    """Print every metric present in both reports with its relative change."""
+    old, new = flatten(before), flatten(after)
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    for key in sorted(old.keys() & new.keys()):
+        if not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key] * 100
+        better = change > 0 if key.endswith(HIGHER_IS_BETTER) else change < 0
+        marker = "+" if better else "-" if change else " "
+        print(f"{marker} {key}: {old[key]} -> {new[key]} ({change:+.1f}%)")
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as before, \
+            open(args.after, encoding="utf-8") as after:
+        compare(json.load(before), json.load(after))
+
+
+if __name__ == "__main__":
+    main()
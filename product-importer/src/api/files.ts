@@ -40,14 +40,43 @@ export function openUploadProgressSocket(
   return new WebSocket(`${BASE_URL.replace('http', 'ws')}/ws/progress/${fileId}`);
 }
 
-export async function searchFiles(query: string): Promise<{ files: any[] }> {
+export interface FilesPage {
+  files: any[];
+  next_cursor: string | null;
+  has_more: boolean;
+}
+
+export async function listFiles(cursor: string | null = null): Promise<FilesPage> {
+  const params = new URLSearchParams();
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+
+  const res = await fetch(`${BASE_URL}/files?${params.toString()}`, {
+    method: 'GET'
+  });
+
+  if (!res.ok) {
+    throw new Error('Failed to fetch files');
+  }
+
+  return await res.json();
+}
+
+export async function searchFiles(
+  query: string,
+  cursor: string | null = null
+): Promise<FilesPage> {
   if (!query || !query.trim()) {
-    return { files: [] };
+    return { files: [], next_cursor: null, has_more: false };
   }
 
   const params = new URLSearchParams({
     q: query.trim()
   });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
 
   const res = await fetch(`${BASE_URL}/files/search?${params.toString()}`, {
     method: 'GET'
@@ -5,7 +5,7 @@ const BASE_URL = 'http://localhost:8000';
 type GetProductsParams = {
   sku?: string;          // exact match
   q?: string;            // search
-  cursor?: number | null;
+  cursor?: string | null;
   limit?: number;
 };
 
@@ -25,7 +25,7 @@ export async function getProducts({
 
   if (sku) params.append("sku", sku);
   if (q && q.trim()) params.append("q", q.trim());
-  if (cursor !== null) params.append("cursor", cursor.toString());
+  if (cursor !== null) params.append("cursor", cursor);
   params.append("limit", limit.toString());
 
   const res = await fetch(`${BASE_URL}/products?${params.toString()}`, {
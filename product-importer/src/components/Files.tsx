@@ -2,7 +2,7 @@ import type { File } from './interface'
 import { useState, useEffect } from 'react'
 import { NavBar } from './NavBar';
 import { SearchInput } from './index';
-import { searchFiles } from '../api/files';
+import { listFiles, searchFiles } from '../api/files';
 import styles from './Files.module.css';
 
 export const Files = () => {
@@ -11,6 +11,9 @@ export const Files = () => {
     const [error, setError] = useState<string>('');
     const [searchQuery, setSearchQuery] = useState('');
     const [isSearchMode, setIsSearchMode] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [hasMore, setHasMore] = useState(false);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     const handleDownload = async (
         e: React.MouseEvent<HTMLAnchorElement>,
@@ -39,21 +42,14 @@ export const Files = () => {
                 setLoading(true);
                 setError('');
                 
-                if (searchQuery.trim()) {
-                    // Search mode
-                    setIsSearchMode(true);
-                    const data = await searchFiles(searchQuery.trim());
-                    setFiles(data.files);
-                } else {
-                    // Normal mode - fetch all files
-                    setIsSearchMode(false);
-                    const res = await fetch("http://localhost:8000/files");
-                    if (!res.ok) {
-                        throw new Error('Failed to fetch files');
-                    }
-                    const json = await res.json();
-                    setFiles(json.files);
-                }
+                // Search mode or normal mode, first page only
+                setIsSearchMode(!!searchQuery.trim());
+                const data = searchQuery.trim()
+                    ? await searchFiles(searchQuery.trim())
+                    : await listFiles();
+                setFiles(data.files);
+                setNextCursor(data.next_cursor);
+                setHasMore(data.has_more);
             } catch (err) {
                 console.error("Failed to fetch files", err);
                 setError('Failed to load files. Please try again.');
@@ -64,6 +60,23 @@ export const Files = () => {
         fetchFiles();
     }, [searchQuery]);
 
+    const handleLoadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const data = searchQuery.trim()
+                ? await searchFiles(searchQuery.trim(), nextCursor)
+                : await listFiles(nextCursor);
+            setFiles(prev => [...prev, ...data.files]);
+            setNextCursor(data.next_cursor);
+            setHasMore(data.has_more);
+        } catch (err) {
+            console.error("Failed to fetch files", err);
+            setError('Failed to load files. Please try again.');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleSearch = (query: string) => {
         setSearchQuery(query);
     };
@@ -127,6 +140,7 @@ export const Files = () => {
                                             <th className={styles.th}>Total Records</th>
                                             <th className={styles.th}>Inserted</th>
                                             <th className={styles.th}>Updated</th>
+                                            <th className={styles.th}>Unchanged</th>
                                             <th className={styles.th}>Errors</th>
                                         </tr>
                                     </thead>
@@ -147,6 +161,7 @@ export const Files = () => {
                                                 <td className={styles.td}>{file.total_number_of_records}</td>
                                                 <td className={styles.td}>{file.records_inserted}</td>
                                                 <td className={styles.td}>{file.records_updated}</td>
+                                                <td className={styles.td}>{file.records_unchanged}</td>
                                                 <td className={styles.td}>
                                                     {file.file_with_errors ? (
                                                         <a
@@ -164,6 +179,15 @@ export const Files = () => {
                                         ))}
                                     </tbody>
                                 </table>
+                                {hasMore && (
+                                    <button
+                                        className={styles.loadMore}
+                                        onClick={handleLoadMore}
+                                        disabled={loadingMore}
+                                    >
+                                        {loadingMore ? 'Loading...' : 'Load more'}
+                                    </button>
+                                )}
                             </div>
                         )}
                     </>
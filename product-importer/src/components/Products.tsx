@@ -11,7 +11,7 @@ const PAGE_SIZE = 15;
 export const Products = () => {
     const [allProducts, setAllProducts] = useState<Product[]>([]);
     const [currentPage, setCurrentPage] = useState(1);
-    const [nextCursor, setNextCursor] = useState<number | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [hasMore, setHasMore] = useState(true);
     const [totalCount, setTotalCount] = useState<number | null>(null);
     const [loading, setLoading] = useState(false);
@@ -48,7 +48,7 @@ export const Products = () => {
 
     const loadingBatchRef = useRef(false);
 
-    const fetchNextBatch = useCallback(async (cursor: number | null = null) => {
+    const fetchNextBatch = useCallback(async (cursor: string | null = null) => {
         if (loadingBatchRef.current) return;
 
         loadingBatchRef.current = true;
@@ -75,7 +75,7 @@ export const Products = () => {
         }
     }, []);
 
-    const fetchSearchResults = useCallback(async (query: string, cursor: number | null = null) => {
+    const fetchSearchResults = useCallback(async (query: string, cursor: string | null = null) => {
         if (loadingBatchRef.current) return;
 
         loadingBatchRef.current = true;
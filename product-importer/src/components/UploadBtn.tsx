@@ -12,6 +12,7 @@ type UploadItem = {
   progress: number;
   total: number;
   errors: number;
+  percent?: number;
   errorMessage?: string;
 };
 
@@ -107,6 +108,7 @@ export const UploadBtn = ({ onUploadComplete }: UploadBtnProps) => {
                 progress: message.progress ?? 0,
                 total: message.total ?? 0,
                 errors: message.errors ?? 0,
+                percent: message.percent,
                 });
             }
             };
@@ -137,7 +139,10 @@ export const UploadBtn = ({ onUploadComplete }: UploadBtnProps) => {
     };
 
 
-    const progressPercentage = (total: number, progress: number) => {
+    const progressPercentage = (total: number, progress: number, percent?: number) => {
+        if (percent !== undefined) {
+            return percent;
+        }
         return total > 0 ? Math.round((progress / total) * 100) : 0;
     }
 
@@ -156,7 +161,7 @@ export const UploadBtn = ({ onUploadComplete }: UploadBtnProps) => {
                     id="fileInput" 
                     type="file" 
                     className={styles.fileInput}
-                    accept=".csv"
+                    accept=".csv,.gz,.zst,.parquet"
                     disabled={checkNumber()}
                 />
                 <button 
@@ -189,7 +194,7 @@ export const UploadBtn = ({ onUploadComplete }: UploadBtnProps) => {
                             <div className={styles.progressBarWrapper}>
                                 <div 
                                     className={styles.progressBar}
-                                    style={{ width: `${progressPercentage(upload.total, upload.progress)}%` }}
+                                    style={{ width: `${progressPercentage(upload.total, upload.progress, upload.percent)}%` }}
                                 ></div>
                             </div>
                             <div className={styles.progressStats}>
@@ -206,7 +211,7 @@ export const UploadBtn = ({ onUploadComplete }: UploadBtnProps) => {
                                 )}
                             </div>
                             <div className={styles.progressPercentage}>
-                                {progressPercentage(upload.total, upload.progress)}%
+                                {progressPercentage(upload.total, upload.progress, upload.percent)}%
                             </div>
                         </>
                     )}
@@ -16,12 +16,13 @@ export type File = {
     total_number_of_records: number;
     records_inserted: number;
     records_updated: number;
+    records_unchanged: number;
     file_with_errors: string;
 }
 
 export interface ProductsResponse {
   products: Product[];
-  next_cursor: number | null;
+  next_cursor: string | null;
   has_more: boolean;
   total_count: number | null;
 }
@@ -10,5 +10,11 @@ export interface UploadProgressMessage {
   progress?: number;
   total?: number;
   errors?: number;
+  inserted?: number;
+  updated?: number;
+  unchanged?: number;
+  percent?: number;
+  bytes_processed?: number;
+  bytes_total?: number;
   message?: string;
 }
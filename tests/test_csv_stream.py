@@ -0,0 +1,124 @@
+"""Tests for splitting CSV objects into byte ranges for parallel chunks."""
+import csv
+import io
+
+import pytest
+
+from app.utils.csv_stream import PROBE_BYTES, RowCounter, plan_byte_ranges
+from app.utils.input_readers import CsvReader
+
+
+class FakeS3:  # pylint: disable=too-few-public-methods
+    """In-memory stand-in for the ranged GETs of one S3 object."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def get_object(self, Bucket: str, Key: str, Range: str) -> dict:  # pylint: disable=invalid-name,unused-argument
+        """Body of the requested `bytes=start-end` range."""
+        start, end = Range.removeprefix("bytes=").split("-")
+        return {"Body": io.BytesIO(self.data[int(start):int(end) + 1])}
+
+
+def to_csv(rows: list[list[str]], lineterminator: str = "\n") -> bytes:
+    """Encode rows the way csv.writer quotes them."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator=lineterminator).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def single_line_rows(data: bytes, step: int) -> bool:
+    """Feed `data` to a RowCounter `step` bytes at a time."""
+    counter = RowCounter()
+    for start in range(0, len(data), step):
+        counter.feed(data[start:start + step])
+    return counter.single_line_rows
+
+
+def read_ranges(data: bytes, chunk_bytes: int) -> tuple[list[str], list[list[str]]]:
+    """Plan ranges over `data` and read every range back like a chunk task."""
+    s3_client = FakeS3(data)
+    plan = plan_byte_ranges(s3_client, "products.csv", len(data), chunk_bytes)
+    assert plan is not None
+    fieldnames, ranges = plan
+    assert [end for _, end in ranges[:-1]] == [start for start, _ in ranges[1:]]
+    assert ranges[-1][1] == len(data)
+    rows = []
+    for start, end in ranges:
+        assert data[start - 1:start] == b"\n"
+        body = io.BytesIO(data[start:end])
+        rows.extend(list(row) for row in CsvReader(body, fieldnames, start_offset=start))
+    return fieldnames, rows
+
+
+QUOTED_ROWS = [
+    ["sku", "name", "description"],
+    *(
+        [f"SKU-{index}", f"lamp, {index}", f'a "quoted" word, then {index}']
+        for index in range(200)
+    ),
+]
+
+
+@pytest.mark.parametrize("lineterminator", ["\n", "\r\n"])
+@pytest.mark.parametrize("chunk_bytes", [1, 37, 500])
+def test_quoted_commas_and_quotes_split_on_record_boundaries(lineterminator, chunk_bytes):
+    """Ranges of a quoted single-line file read back every row exactly once."""
+    data = to_csv(QUOTED_ROWS, lineterminator)
+    assert single_line_rows(data, 7)
+
+    fieldnames, rows = read_ranges(data, chunk_bytes)
+
+    assert fieldnames == QUOTED_ROWS[0]
+    assert rows == QUOTED_ROWS[1:]
+
+
+@pytest.mark.parametrize("step", [1, 5, 4096])
+def test_embedded_newlines_are_not_split(step):
+    """A quoted newline whose next line looks like a row rules out splitting."""
+    rows = [["sku", "description"], ["A", "first line\nSKU-2,looks like a row"], ["B", "x"]]
+
+    assert not single_line_rows(to_csv(rows), step)
+
+
+def test_embedded_newline_on_last_line_without_terminator():
+    """The unterminated last line is checked too."""
+    data = to_csv([["sku", "description"], ["A", "x"]]) + b'B,"open\nstill open"'
+
+    assert not single_line_rows(data, 3)
+
+
+@pytest.mark.parametrize("data", [
+    # A stray quote makes the quoted newline after it look unquoted.
+    b'sku,name\nA,x"y,"multi\nline",z"w\n',
+    b'sku,name\nA,"unterminated\n',
+    b'sku,name\nA,"closed"trailing\n',
+])
+def test_stray_quotes_are_not_split(data):
+    """Quotes the CSV reader takes literally make the quoting untrustworthy."""
+    assert not single_line_rows(data, 4)
+
+
+def test_byte_order_mark_before_quoted_header():
+    """A UTF-8 BOM is not mistaken for text before an opening quote."""
+    data = b'\xef\xbb\xbf"sku",name\nA,x\n'
+
+    assert single_line_rows(data, 64)
+
+
+def test_line_longer_than_probe_window_is_read_serially():
+    """No boundary within PROBE_BYTES falls back to a serial import."""
+    data = b"sku,description\n" + b"A," + b"x" * (PROBE_BYTES + 10) + b"\nB,y\n"
+
+    assert plan_byte_ranges(FakeS3(data), "products.csv", len(data), 1) is None
+
+
+def test_byte_order_mark_is_not_part_of_the_first_column():
+    """Serial reads and planned ranges both see a plain `sku` column."""
+    data = b"\xef\xbb\xbf" + to_csv(QUOTED_ROWS)
+
+    reader = CsvReader(io.BytesIO(data))
+    assert reader.fieldnames == QUOTED_ROWS[0]
+    assert [list(row) for row in reader] == QUOTED_ROWS[1:]
+    assert reader.bytes_read == len(data)
+    assert read_ranges(data, 500) == (QUOTED_ROWS[0], QUOTED_ROWS[1:])